@@ -1,8 +1,8 @@
 """Repository implementation for AIModel model."""
 
-from typing import List, Optional, Type
+from typing import List, Optional, Tuple, Type
 
-from sqlalchemy import or_
+from sqlalchemy import exists, or_, select
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.models.ai_model import AIModel
@@ -91,3 +91,32 @@ class AIModelRepository(BaseRepository[AIModel]):
             return None
         except SQLAlchemyError as e:
             self._handle_db_exception(e, "Error retrieving default AI model")
+
+    def get_usage_flags(self, model_id: int) -> Tuple[bool, bool]:
+        """Check whether an AI model is referenced elsewhere in one query.
+
+        Args:
+            model_id: The ID of the AI model to check
+
+        Returns:
+            Tuple[bool, bool]: Whether the model is used by any chat session,
+                and whether it is the default model in application settings
+
+        Raises:
+            DatabaseError: If a database error occurs
+        """
+        try:
+            from app.models.application_settings import ApplicationSettings
+            from app.models.chat_session import ChatSession
+
+            row = self.session.execute(
+                select(
+                    exists().where(ChatSession.ai_model_id == model_id),
+                    exists().where(ApplicationSettings.default_ai_model_id == model_id),
+                )
+            ).one()
+            return bool(row[0]), bool(row[1])
+        except SQLAlchemyError as e:
+            self._handle_db_exception(
+                e, f"Error checking usage of AI model with ID {model_id}"
+            )
@@ -2,7 +2,7 @@
 
 from typing import List, Optional, Type
 
-from sqlalchemy import or_
+from sqlalchemy import lambda_stmt, or_, select
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.models.user_profile import UserProfile
@@ -33,12 +33,12 @@ class UserProfileRepository(BaseRepository[UserProfile]):
             DatabaseError: If a database error occurs
         """
         try:
-            profile = (
-                self.session.query(UserProfile)
-                .filter(UserProfile.label == label)
-                .first()
+            # lambda_stmt caches the compiled statement per call-site; the
+            # closure variable is extracted as a bound parameter on each call
+            stmt = lambda_stmt(
+                lambda: select(UserProfile).where(UserProfile.label == label)
             )
-            return profile
+            return self.session.execute(stmt).scalars().first()
         except SQLAlchemyError as e:
             self._handle_db_exception(
                 e, f"Error retrieving user profile by label '{label}'"
@@ -57,11 +57,11 @@ class UserProfileRepository(BaseRepository[UserProfile]):
             DatabaseError: If a database error occurs
         """
         try:
-            return (
-                self.session.query(UserProfile)
-                .filter(UserProfile.name.ilike(f"%{name}%"))
-                .all()
+            pattern = f"%{name}%"
+            stmt = lambda_stmt(
+                lambda: select(UserProfile).where(UserProfile.name.ilike(pattern))
             )
+            return list(self.session.execute(stmt).scalars().all())
         except SQLAlchemyError as e:
             self._handle_db_exception(
                 e, f"Error finding user profiles by name '{name}'"
@@ -80,16 +80,16 @@ class UserProfileRepository(BaseRepository[UserProfile]):
             DatabaseError: If a database error occurs
         """
         try:
-            return (
-                self.session.query(UserProfile)
-                .filter(
+            pattern = f"%{query}%"
+            stmt = lambda_stmt(
+                lambda: select(UserProfile).where(
                     or_(
-                        UserProfile.name.ilike(f"%{query}%"),
-                        UserProfile.description.ilike(f"%{query}%"),
+                        UserProfile.name.ilike(pattern),
+                        UserProfile.description.ilike(pattern),
                     )
                 )
-                .all()
             )
+            return list(self.session.execute(stmt).scalars().all())
         except SQLAlchemyError as e:
             self._handle_db_exception(
                 e, f"Error searching user profiles with query '{query}'"
@@ -194,17 +194,16 @@ class AIModelService:
                 details={"model_id": model_id, "label": model.label},
             )
 
-        # Check if there are any chat sessions with this model
-        if hasattr(model, "chat_sessions"):
-            chat_sessions_count = model.chat_sessions.count()
-            if chat_sessions_count > 0:
-                raise BusinessRuleError(
-                    "Cannot delete AI model that is used in chat sessions",
-                    details={"model_id": model_id},
-                )
+        # Check chat session and default-settings references in one query
+        used_in_sessions, is_default = self.repository.get_usage_flags(model_id)
+        if used_in_sessions:
+            raise BusinessRuleError(
+                "Cannot delete AI model that is used in chat sessions",
+                details={"model_id": model_id},
+            )
 
         # Check if this model is set as the default in application settings
-        if hasattr(model, "default_in_settings") and model.default_in_settings:
+        if is_default:
             raise BusinessRuleError(
                 "Cannot delete AI model that is set as default in application settings",
                 details={"model_id": model_id},
@@ -147,6 +147,7 @@ class ApplicationSettingsService:
         # Validate avatar path if provided
         if avatar_path is not None and not avatar_path.strip():
             raise ValidationError(
+                "INVALID_AVATAR_PATH",
                 "Avatar path cannot be empty string",
                 details={
                     "default_avatar_image": "Must provide a valid path or URL, or None"
@@ -315,6 +316,7 @@ class ApplicationSettingsService:
         ):
             if not kwargs["default_avatar_image"].strip():
                 raise ValidationError(
+                    "INVALID_AVATAR_PATH",
                     "Avatar path cannot be empty string",
                     details={
                         "default_avatar_image": "Must provide a valid path or URL, or None"
@@ -12,6 +12,12 @@ from app.services.png_character_parser import PngCharacterParser
 from app.services.image_processing_service import ImageProcessingService
 from app.utils.exceptions import ValidationError, ProcessingError
 
+# Label sanitization: replace disallowed characters, then collapse underscore runs
+_LABEL_INVALID_CHARS_RE = re.compile(r'[^a-zA-Z0-9_\-]')
+_UNDERSCORE_RUN_RE = re.compile(r'_+')
+# Text cleaning: collapse whitespace runs to a single space
+_WHITESPACE_RUN_RE = re.compile(r'\s+')
+
 
 class CharacterExtractService:
     """Service for extracting and mapping character data from PNG files."""
@@ -148,8 +154,8 @@ class CharacterExtractService:
             Generated label string
         """
         # Clean name for use in label
-        clean_name = re.sub(r'[^a-zA-Z0-9_\-]', '_', name.lower())
-        clean_name = re.sub(r'_+', '_', clean_name).strip('_')
+        clean_name = _LABEL_INVALID_CHARS_RE.sub('_', name.lower())
+        clean_name = _UNDERSCORE_RUN_RE.sub('_', clean_name).strip('_')
         
         # Generate timestamp
         timestamp = datetime.utcnow().strftime('%Y%m%d')
@@ -176,7 +182,7 @@ class CharacterExtractService:
             text = str(text)
         
         # Remove excessive whitespace
-        text = re.sub(r'\s+', ' ', text.strip())
+        text = _WHITESPACE_RUN_RE.sub(' ', text.strip())
         
         # Basic length limit (can be adjusted based on requirements)
         if len(text) > 10000:
@@ -238,10 +244,11 @@ class CharacterExtractService:
         if not file_data:
             raise ValidationError("INVALID_FILE_FORMAT", "No file data provided")
         
-        # Validate file size (10MB limit as specified)
+        # Validate file size (10MB limit as specified) before any image work
         max_size_mb = 10
-        file_size_mb = len(file_data) / (1024 * 1024)
-        if file_size_mb > max_size_mb:
+        file_size_bytes = len(file_data)
+        file_size_mb = file_size_bytes / (1024 * 1024)
+        if file_size_bytes > max_size_mb * 1024 * 1024:
             raise ValidationError(
                 "FILE_TOO_LARGE", 
                 f"File size ({file_size_mb:.1f}MB) exceeds limit ({max_size_mb}MB)"
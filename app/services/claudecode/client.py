@@ -2,15 +2,53 @@
 
 import json
 import logging
-import subprocess
-import time
-from typing import Iterator, Dict, Any, Optional
+from typing import Collection, Iterator, Dict, Any, Optional
 
 from app.config import get_config
 from app.utils.exceptions import ValidationError
+from app.utils.subprocess_utils import spawn_streaming
+
+try:
+    # orjson parses the stream-json bytes directly, without a decode step
+    from orjson import loads as _json_loads
+except ImportError:
+    # json.loads also accepts UTF-8 bytes
+    from json import loads as _json_loads
 
 logger = logging.getLogger(__name__)
 
+# Start of a stream-json line as the CLI prints it, before the type name
+_TYPE_PREFIX = b'{"type":"'
+
+
+def _recover_json(line: bytes) -> Optional[Any]:
+    """Parse a stream-json line, salvaging an object wrapped in stray text.
+
+    The line is parsed as-is first, which is the common case. If that fails,
+    the span from the first '{' to the last '}' is tried, which drops Markdown
+    code fences or prose the CLI printed around the object.
+
+    Args:
+        line: Stripped line from the CLI's stdout
+
+    Returns:
+        The parsed value, or None if the line holds no parseable object
+    """
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError
+    try:
+        return _json_loads(line)
+    except json.JSONDecodeError:
+        pass
+
+    start = line.find(b'{')
+    end = line.rfind(b'}')
+    if start == -1 or end < start:
+        return None
+    try:
+        return _json_loads(line[start:end + 1])
+    except json.JSONDecodeError:
+        return None
+
 
 class ClaudeCodeClient:
     """Client for interacting with Claude Code CLI."""
@@ -26,13 +64,20 @@ class ClaudeCodeClient:
         self.timeout = timeout or config.CLAUDE_CODE_TIMEOUT
 
     def chat_completion_stream(
-        self, system_prompt: str, conversation_text: str
+        self,
+        system_prompt: str,
+        conversation_text: str,
+        *,
+        filter_types: Optional[Collection[str]] = None
     ) -> Iterator[Dict[str, Any]]:
         """Stream a chat completion response from Claude Code CLI.
 
         Args:
             system_prompt: System prompt to append to the conversation
             conversation_text: Full conversation history and current message
+            filter_types: Chunk types to yield (e.g. {"assistant"}); all chunks
+                are yielded if None. Lines whose raw prefix names another type
+                are skipped without being parsed.
 
         Yields:
             Parsed streaming JSON response chunks
@@ -59,64 +104,48 @@ class ClaudeCodeClient:
         logger.info(f"Executing Claude Code CLI with system prompt length: {len(system_prompt)}")
         logger.debug(f"Command: {' '.join(command[:-1])} '[SYSTEM_PROMPT]'")
 
+        # Raw line prefixes of the wanted chunk types, for a bytes compare
+        # before parsing
+        type_prefixes = None
+        if filter_types is not None:
+            type_prefixes = tuple(
+                _TYPE_PREFIX + chunk_type.encode('utf-8') + b'"' for chunk_type in filter_types
+            )
+
         try:
             # Start subprocess with conversation text as stdin
-            process = subprocess.Popen(
+            with spawn_streaming(
                 command,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
+                timeout=self.timeout,
+                stdin_data=conversation_text.strip().encode('utf-8')
+            ) as stream:
+                # Stream output line by line; the raw bytes are parsed without decoding
+                for line in stream:
+                    # Skip unwanted chunk types without parsing them
+                    if (
+                        type_prefixes is not None
+                        and line.startswith(_TYPE_PREFIX)
+                        and not line.startswith(type_prefixes)
+                    ):
+                        continue
+
+                    # Parse JSON response chunk, recovering wrapped objects
+                    chunk_data = _recover_json(line)
+                    if chunk_data is None:
+                        # Skip invalid JSON chunks
+                        logger.warning(f"Failed to parse JSON chunk: {line[:100].decode('utf-8', 'replace')}...")
+                        continue
+
+                    # Lines the prefix check could not classify are checked here
+                    if filter_types is not None and chunk_data.get('type') not in filter_types:
+                        continue
 
-            # Send conversation text to stdin and close it
-            try:
-                process.stdin.write(conversation_text.strip().encode('utf-8'))
-                process.stdin.close()
-            except BrokenPipeError:
-                # If the process has already terminated, stdin might be closed
-                logger.warning("Stdin write failed - process may have terminated early")
-
-            # Stream output line by line
-            start_time = time.time()
-            for line in iter(process.stdout.readline, b''):
-                # Check timeout
-                if time.time() - start_time > self.timeout:
-                    process.terminate()
-                    process.wait(timeout=5)  # Give it 5 seconds to terminate gracefully
-                    if process.poll() is None:
-                        process.kill()  # Force kill if it doesn't terminate
-                    raise Exception(f"Claude Code CLI timed out after {self.timeout} seconds")
-
-                # Decode bytes to string and strip whitespace
-                line = line.decode('utf-8').strip()
-                if not line:
-                    continue
-
-                try:
-                    # Parse JSON response chunk
-                    chunk_data = json.loads(line)
                     logger.debug(f"Received chunk type: {chunk_data.get('type', 'unknown')}")
                     yield chunk_data
-                except json.JSONDecodeError as e:
-                    logger.warning(f"Failed to parse JSON chunk: {line[:100]}...")
-                    logger.warning(f"JSON parse error: {e}")
-                    # Skip invalid JSON chunks
-                    continue
-
-            # Wait for process to complete and check return code
-            return_code = process.wait()
-            if return_code != 0:
-                # Read stderr for error details
-                stderr_output = process.stderr.read().decode('utf-8')
-                error_msg = f"Claude Code CLI failed with return code {return_code}"
-                if stderr_output:
-                    error_msg += f": {stderr_output}"
-                logger.error(error_msg)
-                raise Exception(error_msg)
-
-        except subprocess.TimeoutExpired:
-            logger.error(f"Claude Code CLI timed out after {self.timeout} seconds")
-            raise Exception(f"Claude Code CLI timed out after {self.timeout} seconds")
+
+                # Wait for process to complete and check return code
+                return_code = stream.wait()
+
         except FileNotFoundError:
             logger.error(f"Claude Code CLI executable not found: {self.executable_path}")
             raise Exception(f"Claude Code CLI executable not found: {self.executable_path}")
@@ -124,6 +153,19 @@ class ClaudeCodeClient:
             logger.error(f"Error executing Claude Code CLI: {e}")
             raise Exception(f"Claude Code CLI execution failed: {e}")
 
+        if stream.timed_out:
+            logger.error(f"Claude Code CLI timed out after {self.timeout} seconds")
+            raise Exception(f"Claude Code CLI timed out after {self.timeout} seconds")
+
+        if return_code != 0:
+            # Read stderr for error details
+            stderr_output = stream.read_stderr()
+            error_msg = f"Claude Code CLI failed with return code {return_code}"
+            if stderr_output:
+                error_msg += f": {stderr_output}"
+            logger.error(error_msg)
+            raise Exception(error_msg)
+
     def test_connection(self) -> bool:
         """Test the Claude Code CLI connection.
 
@@ -136,7 +178,9 @@ class ClaudeCodeClient:
             conversation_text = "Hello, this is a connection test."
             
             # Try to get at least one response chunk
-            for chunk in self.chat_completion_stream(system_prompt, conversation_text):
+            for chunk in self.chat_completion_stream(
+                system_prompt, conversation_text, filter_types={'assistant'}
+            ):
                 if chunk.get('type') == 'assistant':
                     return True
             
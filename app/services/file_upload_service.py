@@ -1,5 +1,7 @@
 """File upload service for handling avatar images and other file uploads."""
 
+import io
+import os
 import uuid
 from pathlib import Path
 from typing import Optional
@@ -34,17 +36,21 @@ class FileUploadError(Exception):
 class FileUploadService:
     """Service for handling file uploads with validation and processing."""
 
-    ALLOWED_MIME_TYPES = {
-        "image/jpeg",
-        "image/jpg",
-        "image/png",
-        "image/gif",
-        "image/webp",
-    }
-
-    ALLOWED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
+    ALLOWED_MIME_TYPES = frozenset(
+        {
+            "image/jpeg",
+            "image/jpg",
+            "image/png",
+            "image/gif",
+            "image/webp",
+        }
+    )
+
+    # Lowercase, as returned by _get_file_extension
+    ALLOWED_EXTENSIONS = frozenset({".jpg", ".jpeg", ".png", ".gif", ".webp"})
     MAX_FILE_SIZE = 5 * 1024 * 1024  # 5MB
     MAX_IMAGE_DIMENSIONS = (1024, 1024)
+    THUMBNAIL_REDUCING_GAP = 2.0
 
     def __init__(self, upload_dir: Optional[str] = None):
         """Initialize the file upload service and create necessary directories.
@@ -84,20 +90,15 @@ class FileUploadService:
         unique_filename = f"{uuid.uuid4()}{file_extension}"
         file_path = self.AVATAR_DIR / unique_filename
 
-        # Save file
+        # Read the upload into memory; it is validated there and written once
+        data = io.BytesIO()
         try:
-            file.save(str(file_path))
+            file.save(data)
         except Exception as e:
             raise FileUploadError(f"Failed to save file: {str(e)}", 500)
 
-        # Validate and potentially resize image
-        try:
-            self._process_image(file_path)
-        except Exception as e:
-            # Clean up if image processing fails
-            if file_path.exists():
-                file_path.unlink()
-            raise FileUploadError(f"Invalid image file: {str(e)}")
+        # Validate, potentially resize and save image
+        self._store_image(data, file_path)
 
         # Return relative path for database storage
         return f"avatars/{unique_filename}"
@@ -131,7 +132,7 @@ class FileUploadService:
         # Check file extension
         if file.filename:
             file_extension = self._get_file_extension(file.filename)
-            if file_extension.lower() not in self.ALLOWED_EXTENSIONS:
+            if file_extension not in self.ALLOWED_EXTENSIONS:
                 raise FileUploadError(
                     f"Invalid file extension. Allowed extensions: {', '.join(self.ALLOWED_EXTENSIONS)}"
                 )
@@ -160,22 +161,14 @@ class FileUploadService:
         unique_filename = f"{uuid.uuid4()}{file_extension}"
         file_path = self.AVATAR_DIR / unique_filename
 
-        # Save file
+        # Read the upload into memory; it is validated there and written once
         try:
-            contents = await file.read()
-            with open(file_path, "wb") as f:
-                f.write(contents)
+            data = io.BytesIO(await file.read())
         except Exception as e:
             raise FileUploadError(f"Failed to save file: {str(e)}", 500)
 
-        # Validate and potentially resize image
-        try:
-            self._process_image(file_path)
-        except Exception as e:
-            # Clean up if image processing fails
-            if file_path.exists():
-                file_path.unlink()
-            raise FileUploadError(f"Invalid image file: {str(e)}")
+        # Validate, potentially resize and save image
+        self._store_image(data, file_path)
 
         # Return relative path for database storage
         return f"avatars/{unique_filename}"
@@ -208,7 +201,7 @@ class FileUploadService:
         # Check file extension
         if file.filename:
             file_extension = self._get_file_extension(file.filename)
-            if file_extension.lower() not in self.ALLOWED_EXTENSIONS:
+            if file_extension not in self.ALLOWED_EXTENSIONS:
                 raise FileUploadError(
                     f"Invalid file extension. Allowed extensions: {', '.join(self.ALLOWED_EXTENSIONS)}"
                 )
@@ -221,7 +214,7 @@ class FileUploadService:
             filename: The original filename
 
         Returns:
-            str: The file extension including the dot
+            str: The lowercase file extension including the dot
 
         Raises:
             HTTPException: If no valid extension found
@@ -229,36 +222,77 @@ class FileUploadService:
         if not filename:
             raise FileUploadError("Filename is required")
 
-        extension = Path(filename).suffix.lower()
-        if not extension:
+        extension = os.path.splitext(filename)[1].lower()
+        # A trailing dot ("file.") is not an extension
+        if len(extension) < 2:
             raise FileUploadError("File must have an extension")
 
         return extension
 
-    def _process_image(self, file_path: Path) -> None:
+    def _store_image(self, data: io.BytesIO, file_path: Path) -> None:
+        """
+        Validate an in-memory image and write it, resized if needed, to disk.
+
+        Args:
+            data: The uploaded image bytes
+            file_path: Where to save the processed image
+
+        Raises:
+            FileUploadError: If the image is invalid or can't be written
+        """
+        try:
+            image_bytes = self._process_image(data)
+        except Exception as e:
+            raise FileUploadError(f"Invalid image file: {str(e)}")
+
+        try:
+            file_path.write_bytes(image_bytes)
+        except Exception as e:
+            # Clean up a partially written file
+            file_path.unlink(missing_ok=True)
+            raise FileUploadError(f"Failed to save file: {str(e)}", 500)
+
+    def _process_image(self, data: io.BytesIO) -> memoryview:
         """
-        Process and validate image file.
+        Process and validate an in-memory image.
 
         Args:
-            file_path: Path to the saved image file
+            data: The image file contents
+
+        Returns:
+            memoryview: The image to store; the upload itself when no resize is needed
 
         Raises:
             Exception: If image processing fails
         """
-        with Image.open(file_path) as img:
+        with Image.open(data) as img:
+            # Check dimensions (read from the header, no pixel decoding)
+            needs_resize = (
+                img.size[0] > self.MAX_IMAGE_DIMENSIONS[0]
+                or img.size[1] > self.MAX_IMAGE_DIMENSIONS[1]
+            )
             # Validate image can be opened (checks if it's really an image)
             img.verify()
 
+        # Images within the limits are kept as uploaded, without re-encoding
+        if not needs_resize:
+            return data.getbuffer()
+
         # Reopen for processing (verify() closes the image)
-        with Image.open(file_path) as img:
-            # Check dimensions
-            if (
-                img.size[0] > self.MAX_IMAGE_DIMENSIONS[0]
-                or img.size[1] > self.MAX_IMAGE_DIMENSIONS[1]
-            ):
-                # Resize image while maintaining aspect ratio
-                img.thumbnail(self.MAX_IMAGE_DIMENSIONS, Image.Resampling.LANCZOS)
-                img.save(file_path, optimize=True, quality=85)
+        data.seek(0)
+        output = io.BytesIO()
+        with Image.open(data) as img:
+            image_format = img.format
+            # Resize image while maintaining aspect ratio; reducing_gap first
+            # shrinks with a cheap integer reduce(), then LANCZOS-filters the
+            # much smaller intermediate
+            img.thumbnail(
+                self.MAX_IMAGE_DIMENSIONS,
+                Image.Resampling.LANCZOS,
+                reducing_gap=self.THUMBNAIL_REDUCING_GAP,
+            )
+            img.save(output, format=image_format, optimize=True, quality=85)
+        return output.getbuffer()
 
     def delete_avatar_image(self, relative_path: str) -> bool:
         """
@@ -273,16 +307,17 @@ class FileUploadService:
         if not relative_path or not relative_path.startswith("avatars/"):
             return False
 
-        file_path = self.UPLOAD_DIR / relative_path
-
-        if file_path.exists() and file_path.is_file():
-            try:
-                file_path.unlink()
-                return True
-            except Exception:
-                return False
+        # Reject traversal ("avatars/../x") from the string alone, without
+        # touching the filesystem
+        if "\\" in relative_path or ".." in relative_path.split("/"):
+            return False
 
-        return False
+        try:
+            (self.UPLOAD_DIR / relative_path).unlink()
+        except OSError:
+            # Missing, a directory, or not permitted
+            return False
+        return True
 
     def get_avatar_url(self, relative_path: Optional[str]) -> Optional[str]:
         """
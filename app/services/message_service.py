@@ -868,7 +868,9 @@ class MessageService:
         try:
             # Stream response from Claude Code CLI
             for chunk in self.claudecode_client.chat_completion_stream(
-                system_prompt=system_prompt, conversation_text=conversation_text
+                system_prompt=system_prompt,
+                conversation_text=conversation_text,
+                filter_types={"assistant"},
             ):
                 # Extract content from assistant message chunks
                 if chunk.get("type") == "assistant" and chunk.get("message"):
@@ -0,0 +1,265 @@
+"""Utilities for running subprocesses whose stdout is streamed line by line."""
+
+import logging
+import os
+import signal
+import subprocess
+import threading
+from typing import IO, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Pipe buffer size and maximum bytes taken from stdout per read
+_READ_CHUNK_SIZE = 65536
+
+# Seconds a timed-out process gets to exit after SIGTERM before it is killed
+_TERMINATE_GRACE_PERIOD = 0.1
+
+# Start each process as the leader of its own process group so stopping it
+# also stops any children it spawns
+_USE_PROCESS_GROUP = os.name == "posix"
+if _USE_PROCESS_GROUP:
+    _PROCESS_GROUP_KWARGS = {"start_new_session": True}
+else:
+    _PROCESS_GROUP_KWARGS = {"creationflags": subprocess.CREATE_NEW_PROCESS_GROUP}
+
+# Whether a child's exit can be awaited without reaping it (not on macOS)
+_WAIT_WITHOUT_REAPING = hasattr(os, "waitid") and hasattr(os, "WNOWAIT")
+
+
+def _iter_lines(
+    stream: IO[bytes], chunk_size: int = _READ_CHUNK_SIZE
+) -> Iterator[bytes]:
+    """Yield newline-separated lines from a binary stream.
+
+    Uses read1() so each read returns whatever the pipe already holds (at most
+    one syscall) rather than one call per line; a partial trailing line is
+    carried over to the next read.
+
+    Args:
+        stream: Binary stream supporting read1(), e.g. a Popen stdout pipe
+        chunk_size: Maximum number of bytes to read at a time
+
+    Yields:
+        Lines without their trailing newline
+    """
+    pending = b""
+    while True:
+        chunk = stream.read1(chunk_size)
+        if not chunk:
+            break
+        lines = (pending + chunk).split(b"\n")
+        pending = lines.pop()
+        yield from lines
+    if pending:
+        yield pending
+
+
+def _signal_process_group(process: subprocess.Popen, sig: int) -> None:
+    """Send a signal to every process in the group led by ``process``.
+
+    Args:
+        process: Process started with _PROCESS_GROUP_KWARGS
+        sig: Signal to send
+    """
+    try:
+        # start_new_session makes the process group ID equal to the PID
+        os.killpg(process.pid, sig)
+    except ProcessLookupError:
+        # The whole group has already exited
+        pass
+
+
+def _stop_process(
+    process: subprocess.Popen, grace_period: float = _TERMINATE_GRACE_PERIOD
+) -> None:
+    """Terminate a process, killing it if it has not exited after a grace period.
+
+    SIGTERM lets a well-behaved process flush and exit; SIGKILL bounds how long
+    a hung one can keep running. On POSIX the signals go to the whole process
+    group so its children are stopped too.
+
+    Args:
+        process: Process to stop
+        grace_period: Seconds to wait after SIGTERM before sending SIGKILL
+    """
+    if _USE_PROCESS_GROUP:
+        _signal_process_group(process, signal.SIGTERM)
+    else:
+        process.terminate()
+    try:
+        process.wait(timeout=grace_period)
+    except subprocess.TimeoutExpired:
+        if _USE_PROCESS_GROUP:
+            _signal_process_group(process, signal.SIGKILL)
+        else:
+            process.kill()
+        process.wait()
+
+
+def _write_stdin(process: subprocess.Popen, data: bytes) -> None:
+    """Write ``data`` to the process's stdin and close it.
+
+    Writes go straight to the pipe's file descriptor, skipping the copy into
+    the BufferedWriter. If the process has already exited the broken pipe is
+    logged and ignored; stdin is closed either way.
+
+    Args:
+        process: Process started with stdin=subprocess.PIPE
+        data: Bytes to send
+    """
+    try:
+        fd = process.stdin.fileno()
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view) :]
+    except BrokenPipeError:
+        # If the process has already terminated, stdin might be closed
+        logger.warning("Stdin write failed - process may have terminated early")
+    finally:
+        try:
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+
+
+class StreamingProcess:
+    """A running subprocess whose stdout is iterated as lines.
+
+    Use through spawn_streaming(). Iterating yields stripped, non-empty stdout
+    lines as bytes. The process is stopped if it outlives the timeout (which
+    sets ``timed_out``) or if the block is left before it exits.
+    """
+
+    def __init__(
+        self, command: List[str], timeout: float, stdin_data: Optional[bytes]
+    ) -> None:
+        """Store the spawn parameters; the process starts on __enter__.
+
+        Args:
+            command: Executable and arguments
+            timeout: Seconds before the process is stopped
+            stdin_data: Bytes written to stdin before it is closed, if any
+        """
+        self.command = command
+        self.timeout = timeout
+        self.stdin_data = stdin_data
+        self.process: Optional[subprocess.Popen] = None
+        self._timed_out = threading.Event()
+        self._timer: Optional[threading.Timer] = None
+        # Held while reaping or signalling the process, so the timer never
+        # signals a process (group) whose PID has been reaped and reused
+        self._lock = threading.Lock()
+
+    @property
+    def timed_out(self) -> bool:
+        """Whether the process was stopped for exceeding the timeout."""
+        return self._timed_out.is_set()
+
+    def __enter__(self) -> "StreamingProcess":
+        """Start the process, send its stdin and arm the timeout."""
+        self.process = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=_READ_CHUNK_SIZE,  # Match the read1() chunk size
+            **_PROCESS_GROUP_KWARGS,
+        )
+
+        # Stop the process if it outlives the timeout; its exit closes stdout,
+        # which ends iteration
+        self._timer = threading.Timer(self.timeout, self._on_timeout)
+        self._timer.daemon = True
+        self._timer.start()
+
+        # Always close stdin so a process reading it is not left waiting
+        try:
+            _write_stdin(self.process, self.stdin_data or b"")
+        except BaseException:
+            # __exit__ does not run when __enter__ raises
+            self._close()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback) -> None:
+        """Cancel the timeout and stop the process if it is still running."""
+        self._close()
+
+    def __iter__(self) -> Iterator[bytes]:
+        """Yield stripped, non-empty stdout lines."""
+        for line in _iter_lines(self.process.stdout):
+            line = line.strip()
+            if line:
+                yield line
+
+    def wait(self) -> int:
+        """Wait for the process to exit and cancel the timeout.
+
+        Returns:
+            The process return code
+        """
+        if _WAIT_WITHOUT_REAPING:
+            # Wait for the exit without reaping, so the PID stays reserved
+            # until the timer is cancelled under the lock
+            try:
+                os.waitid(os.P_PID, self.process.pid, os.WEXITED | os.WNOWAIT)
+            except ChildProcessError:
+                # Already reaped
+                pass
+        else:
+            self.process.wait()
+        with self._lock:
+            self._timer.cancel()
+            return self.process.wait()
+
+    def read_stderr(self) -> str:
+        """Read everything the process wrote to stderr.
+
+        Returns:
+            The decoded stderr output
+        """
+        return self.process.stderr.read().decode("utf-8", "replace")
+
+    def _on_timeout(self) -> None:
+        """Timer callback: record the timeout and stop the process."""
+        with self._lock:
+            # A process that exited just as the timer fired did not time out
+            if self.process.poll() is not None:
+                return
+            self._timed_out.set()
+            _stop_process(self.process)
+
+    def _close(self) -> None:
+        """Cancel the timeout and stop the process if it is still running."""
+        with self._lock:
+            self._timer.cancel()
+            if self.process.poll() is None:
+                _stop_process(self.process)
+
+
+def spawn_streaming(
+    command: List[str], *, timeout: float, stdin_data: Optional[bytes] = None
+) -> StreamingProcess:
+    """Spawn a process whose stdout is consumed as a stream of lines.
+
+    Stdout is read with read1() into 64 KiB chunks, the process runs in its
+    own process group, and a timer stops it (SIGTERM, then SIGKILL) once the
+    timeout elapses.
+
+    Args:
+        command: Executable and arguments
+        timeout: Seconds before the process is stopped
+        stdin_data: Bytes written to stdin before it is closed, if any
+
+    Returns:
+        A context manager; the process starts when the block is entered
+
+    Example:
+        >>> with spawn_streaming(["cat"], timeout=5, stdin_data=b"a\\nb\\n") as proc:
+        ...     lines = list(proc)
+        ...     return_code = proc.wait()
+        >>> lines, return_code
+        ([b'a', b'b'], 0)
+    """
+    return StreamingProcess(command, timeout, stdin_data)
@@ -261,6 +261,7 @@ class TestApplicationSettingsAPI:
         """Test validation error when updating application settings."""
         # Configure the mock to raise validation error
         mock_application_settings_service.update_settings.side_effect = ValidationError(
+            "INVALID_AVATAR_PATH",
             "Avatar path cannot be empty string",
             details={
                 "default_avatar_image": "Must provide a valid path or URL, or None"
@@ -3,6 +3,7 @@
 from unittest.mock import patch
 
 import pytest
+from sqlalchemy import event
 from sqlalchemy.exc import SQLAlchemyError
 
 from app.models.application_settings import ApplicationSettings
@@ -99,6 +100,47 @@ class TestAIModelRepository:
         default_model = repo.get_default_model()
         assert default_model is None
 
+    def test_get_usage_flags(self, db_session, create_chat_session):
+        """Test usage flags reflect chat sessions and default settings."""
+        repo = AIModelRepository(db_session)
+
+        unused = repo.create(label="unused_model")
+        chat_session = create_chat_session()
+        db_session.add(chat_session)
+        db_session.add(ApplicationSettings(default_ai_model_id=unused.id))
+        db_session.commit()
+
+        assert repo.get_usage_flags(unused.id) == (False, True)
+        assert repo.get_usage_flags(chat_session.ai_model_id) == (True, False)
+
+    def test_get_usage_flags_single_query(self, db_session, create_models):
+        """Test usage flags are fetched in a single SQL round-trip."""
+        repo = AIModelRepository(db_session)
+        model_id = create_models[0].id
+        statements = []
+
+        def _count(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        engine = db_session.get_bind()
+        event.listen(engine, "before_cursor_execute", _count)
+        try:
+            assert repo.get_usage_flags(model_id) == (False, False)
+        finally:
+            event.remove(engine, "before_cursor_execute", _count)
+
+        assert len(statements) == 1
+
+    def test_database_error_in_get_usage_flags(self, db_session):
+        """Test handling of database errors in get_usage_flags method."""
+        repo = AIModelRepository(db_session)
+
+        with patch.object(
+            db_session, "execute", side_effect=SQLAlchemyError("Test error")
+        ):
+            with pytest.raises(DatabaseError):
+                repo.get_usage_flags(1)
+
     def test_database_error_in_get_default_model(self, db_session):
         """Test handling of database errors in get_default_model method."""
         repo = AIModelRepository(db_session)
@@ -3,7 +3,10 @@
 from unittest.mock import patch
 
 import pytest
+from sqlalchemy import event
+from sqlalchemy.engine.default import CACHE_HIT
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.sql.lambdas import StatementLambdaElement
 
 from app.models.application_settings import ApplicationSettings
 from app.repositories.user_profile_repository import UserProfileRepository
@@ -57,6 +60,33 @@ class TestUserProfileRepository:
 
         assert profile is None
 
+    def test_get_by_label_reuses_cached_statement(self, db_session, create_profiles):
+        """Test label lookups with different labels share one compiled statement."""
+        repo = UserProfileRepository(db_session)
+        contexts = []
+
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            contexts.append(context)
+
+        engine = db_session.get_bind()
+        event.listen(engine, "before_cursor_execute", _record)
+        try:
+            first = repo.get_by_label("profile1")
+            second = repo.get_by_label("profile2")
+        finally:
+            event.remove(engine, "before_cursor_execute", _record)
+
+        # Each call binds its own label
+        assert first.label == "profile1"
+        assert second.label == "profile2"
+
+        # The lookup is a lambda statement and the second call is served from
+        # the statement cache
+        assert len(contexts) == 2
+        assert isinstance(contexts[1].invoked_statement, StatementLambdaElement)
+        assert contexts[1].cache_hit is CACHE_HIT
+        assert contexts[1].compiled is contexts[0].compiled
+
     def test_get_by_name(self, db_session, create_profiles):
         """Test finding user profiles by name."""
         repo = UserProfileRepository(db_session)
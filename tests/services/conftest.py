@@ -0,0 +1,138 @@
+"""Shared fixtures for service tests."""
+
+from pathlib import Path
+from unittest.mock import create_autospec
+
+import pytest
+
+from app.repositories.ai_model_repository import AIModelRepository
+from app.repositories.application_settings_repository import (
+    ApplicationSettingsRepository,
+)
+from app.repositories.character_repository import CharacterRepository
+from app.repositories.chat_session_repository import ChatSessionRepository
+from app.repositories.system_prompt_repository import SystemPromptRepository
+from app.repositories.user_profile_repository import UserProfileRepository
+from app.services.chat_session_service import ChatSessionService
+
+# Fixtures that give a test a real database, so it is not a unit test
+_DATABASE_FIXTURES = {"db_engine", "db_session"}
+
+
+def pytest_collection_modifyitems(items):
+    """Mark the service tests that need no database as ``unit``.
+
+    Tests marked ``integration`` keep that marker instead.
+    """
+    services_dir = Path(__file__).parent
+    for item in items:
+        if (
+            services_dir in item.path.parents
+            and not _DATABASE_FIXTURES.intersection(item.fixturenames)
+            and item.get_closest_marker("integration") is None
+        ):
+            item.add_marker(pytest.mark.unit)
+
+
+@pytest.fixture(scope="session")
+def _service_repo_mocks():
+    """Create autospec'd repository mocks once per test session.
+
+    Building an autospec walks the repository class, so it is only done once;
+    the function-scoped fixtures below reset the shared mocks for each test.
+    """
+    repositories = {
+        "chat_session": ChatSessionRepository,
+        "character": CharacterRepository,
+        "user_profile": UserProfileRepository,
+        "ai_model": AIModelRepository,
+        "system_prompt": SystemPromptRepository,
+        "application_settings": ApplicationSettingsRepository,
+    }
+    # Named so assertion failures say which repository a call went to
+    return {
+        key: create_autospec(repository, instance=True, name=f"{key}_repository")
+        for key, repository in repositories.items()
+    }
+
+
+def _reset(mock):
+    """Clear call history, return values and side effects from a shared mock."""
+    mock.reset_mock(return_value=True, side_effect=True)
+    return mock
+
+
+@pytest.fixture
+def mock_chat_session_repository(_service_repo_mocks):
+    """Provide a freshly reset mock chat session repository."""
+    return _reset(_service_repo_mocks["chat_session"])
+
+
+@pytest.fixture
+def mock_character_repository(_service_repo_mocks):
+    """Provide a freshly reset mock character repository."""
+    return _reset(_service_repo_mocks["character"])
+
+
+@pytest.fixture
+def mock_user_profile_repository(_service_repo_mocks):
+    """Provide a freshly reset mock user profile repository."""
+    return _reset(_service_repo_mocks["user_profile"])
+
+
+@pytest.fixture
+def mock_ai_model_repository(_service_repo_mocks):
+    """Provide a freshly reset mock AI model repository."""
+    return _reset(_service_repo_mocks["ai_model"])
+
+
+@pytest.fixture
+def mock_system_prompt_repository(_service_repo_mocks):
+    """Provide a freshly reset mock system prompt repository."""
+    return _reset(_service_repo_mocks["system_prompt"])
+
+
+@pytest.fixture
+def mock_application_settings_repository(_service_repo_mocks):
+    """Provide a freshly reset mock application settings repository."""
+    return _reset(_service_repo_mocks["application_settings"])
+
+
+@pytest.fixture(scope="module")
+def character_extract_template():
+    """Build a CharacterExtractService once per module for tests to copy.
+
+    Tests take a shallow copy and rebind its collaborators, so the template
+    itself is never mutated. The import is deferred so modules that do not
+    request it skip loading PIL and the PNG parser.
+    """
+    from app.services.character_extract_service import CharacterExtractService
+
+    return CharacterExtractService()
+
+
+@pytest.fixture(scope="session")
+def _chat_session_service(_service_repo_mocks):
+    """Create a ChatSessionService over the shared mocks once per session."""
+    return ChatSessionService(
+        _service_repo_mocks["chat_session"],
+        _service_repo_mocks["character"],
+        _service_repo_mocks["user_profile"],
+        _service_repo_mocks["ai_model"],
+        _service_repo_mocks["system_prompt"],
+        _service_repo_mocks["application_settings"],
+    )
+
+
+@pytest.fixture
+def chat_session_service(
+    _chat_session_service,
+    mock_chat_session_repository,
+    mock_character_repository,
+    mock_user_profile_repository,
+    mock_ai_model_repository,
+    mock_system_prompt_repository,
+    mock_application_settings_repository,
+):
+    """Provide the shared ChatSessionService with all its repositories reset."""
+    return _chat_session_service
@@ -1,36 +1,117 @@
 """Tests for the ApplicationSettingsService class."""
 
-from unittest.mock import MagicMock, patch
+from unittest.mock import patch
 
 import pytest
 
 from app.models.application_settings import ApplicationSettings
+from app.services import application_settings_service as settings_service_module
 from app.services.application_settings_service import ApplicationSettingsService
 from app.utils.exceptions import ResourceNotFoundError, ValidationError
 
+# Placeholder for "entity exists"; the service only checks get_by_id doesn't raise
+_EXISTS = object()
+
+# Shared side effect for missing entities; the service only checks the type
+_NOT_FOUND_ERR = ResourceNotFoundError("Not found")
+
+
+# (service/repository method, entity repository fixture, service argument)
+_DEFAULT_ENTITY_CASES = [
+    pytest.param(
+        "update_default_ai_model",
+        "mock_ai_model_repository",
+        "model_id",
+        id="ai_model",
+    ),
+    pytest.param(
+        "update_default_system_prompt",
+        "mock_system_prompt_repository",
+        "prompt_id",
+        id="system_prompt",
+    ),
+    pytest.param(
+        "update_default_user_profile",
+        "mock_user_profile_repository",
+        "profile_id",
+        id="user_profile",
+    ),
+]
+
+# (service method, entity repository fixture, service kwargs, settings repository
+# method that must not be reached)
+_NOT_FOUND_CASES = [
+    pytest.param(
+        "update_default_ai_model",
+        "mock_ai_model_repository",
+        {"model_id": 999},
+        "update_default_ai_model",
+        id="default_ai_model",
+    ),
+    pytest.param(
+        "update_default_system_prompt",
+        "mock_system_prompt_repository",
+        {"prompt_id": 999},
+        "update_default_system_prompt",
+        id="default_system_prompt",
+    ),
+    pytest.param(
+        "update_default_user_profile",
+        "mock_user_profile_repository",
+        {"profile_id": 999},
+        "update_default_user_profile",
+        id="default_user_profile",
+    ),
+    pytest.param(
+        "update_settings",
+        "mock_ai_model_repository",
+        {"default_ai_model_id": 999},
+        "save_settings",
+        id="settings_ai_model",
+    ),
+    pytest.param(
+        "update_settings",
+        "mock_system_prompt_repository",
+        {"default_system_prompt_id": 999},
+        "save_settings",
+        id="settings_system_prompt",
+    ),
+    pytest.param(
+        "update_settings",
+        "mock_user_profile_repository",
+        {"default_user_profile_id": 999},
+        "save_settings",
+        id="settings_user_profile",
+    ),
+]
+
+# Settings repository methods that return the (updated) settings singleton
+_SETTINGS_RETURNING_METHODS = (
+    "get_settings",
+    "save_settings",
+    "update_default_ai_model",
+    "update_default_system_prompt",
+    "update_default_user_profile",
+    "update_default_avatar_image",
+)
+
 
 class TestApplicationSettingsService:
     """Test the ApplicationSettingsService functionality."""
 
     @pytest.fixture
-    def mock_application_settings_repository(self):
-        """Create a mock application settings repository."""
-        return MagicMock()
-
-    @pytest.fixture
-    def mock_ai_model_repository(self):
-        """Create a mock AI model repository."""
-        return MagicMock()
-
-    @pytest.fixture
-    def mock_system_prompt_repository(self):
-        """Create a mock system prompt repository."""
-        return MagicMock()
+    def mock_application_settings_repository(
+        self, mock_application_settings_repository, sample_settings
+    ):
+        """Make the shared settings repository mock return sample_settings.
 
-    @pytest.fixture
-    def mock_user_profile_repository(self):
-        """Create a mock user profile repository."""
-        return MagicMock()
+        Tests that expect a different result override the return value locally.
+        """
+        for name in _SETTINGS_RETURNING_METHODS:
+            getattr(mock_application_settings_repository, name).return_value = (
+                sample_settings
+            )
+        return mock_application_settings_repository
 
     @pytest.fixture
     def service(
@@ -48,9 +129,9 @@ class TestApplicationSettingsService:
             mock_user_profile_repository,
         )
 
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def sample_settings(self):
-        """Create a sample ApplicationSettings instance for testing."""
+        """Create a sample ApplicationSettings instance shared read-only by tests."""
         return ApplicationSettings(
             id=1,
             default_ai_model_id=1,
@@ -59,249 +140,103 @@ class TestApplicationSettingsService:
             default_avatar_image="/path/to/default/avatar.png",
         )
 
-    def test_get_settings(
-        self, service, mock_application_settings_repository, sample_settings
-    ):
-        """Test getting application settings."""
-        # Setup
-        mock_application_settings_repository.get_settings.return_value = sample_settings
-
-        # Execute
-        result = service.get_settings()
-
-        # Verify
-        assert result == sample_settings
-        mock_application_settings_repository.get_settings.assert_called_once()
-
-    def test_update_default_ai_model(
-        self,
-        service,
-        mock_application_settings_repository,
-        mock_ai_model_repository,
-        sample_settings,
-    ):
-        """Test updating the default AI model."""
-        # Setup
-        mock_ai_model_repository.get_by_id.return_value = MagicMock()  # AI model exists
-        mock_application_settings_repository.update_default_ai_model.return_value = (
-            sample_settings
-        )
-
-        # Execute
-        result = service.update_default_ai_model(model_id=1)
-
-        # Verify
-        assert result == sample_settings
-        mock_ai_model_repository.get_by_id.assert_called_once_with(1)
-        mock_application_settings_repository.update_default_ai_model.assert_called_once_with(
-            1
-        )
-
-    def test_update_default_ai_model_null(
-        self,
-        service,
-        mock_application_settings_repository,
-        mock_ai_model_repository,
-        sample_settings,
-    ):
-        """Test clearing the default AI model."""
-        # Setup
-        updated_settings = ApplicationSettings(
+    @pytest.fixture(scope="module")
+    def cleared_avatar_settings(self):
+        """Create sample settings with the default avatar image cleared."""
+        return ApplicationSettings(
             id=1,
-            default_ai_model_id=None,  # Cleared
+            default_ai_model_id=1,
             default_system_prompt_id=1,
             default_user_profile_id=1,
-            default_avatar_image="/path/to/default/avatar.png",
-        )
-        mock_application_settings_repository.update_default_ai_model.return_value = (
-            updated_settings
-        )
-
-        # Execute
-        result = service.update_default_ai_model(model_id=None)
-
-        # Verify
-        assert result == updated_settings
-        mock_ai_model_repository.get_by_id.assert_not_called()  # No need to check if None
-        mock_application_settings_repository.update_default_ai_model.assert_called_once_with(
-            None
-        )
-
-    def test_update_default_ai_model_not_found(
-        self, service, mock_application_settings_repository, mock_ai_model_repository
-    ):
-        """Test updating with non-existent AI model."""
-        # Setup
-        mock_ai_model_repository.get_by_id.side_effect = ResourceNotFoundError(
-            "Not found"
-        )
-
-        # Execute and verify
-        with pytest.raises(ResourceNotFoundError):
-            service.update_default_ai_model(model_id=999)
-
-        # Verify repository method was not called
-        mock_application_settings_repository.update_default_ai_model.assert_not_called()
-
-    def test_update_default_system_prompt(
-        self,
-        service,
-        mock_application_settings_repository,
-        mock_system_prompt_repository,
-        sample_settings,
-    ):
-        """Test updating the default system prompt."""
-        # Setup
-        mock_system_prompt_repository.get_by_id.return_value = (
-            MagicMock()
-        )  # System prompt exists
-        mock_application_settings_repository.update_default_system_prompt.return_value = (
-            sample_settings
-        )
-
-        # Execute
-        result = service.update_default_system_prompt(prompt_id=1)
-
-        # Verify
-        assert result == sample_settings
-        mock_system_prompt_repository.get_by_id.assert_called_once_with(1)
-        mock_application_settings_repository.update_default_system_prompt.assert_called_once_with(
-            1
+            default_avatar_image=None,  # Cleared
         )
 
-    def test_update_default_system_prompt_null(
-        self,
-        service,
-        mock_application_settings_repository,
-        mock_system_prompt_repository,
-        sample_settings,
-    ):
-        """Test clearing the default system prompt."""
-        # Setup
-        updated_settings = ApplicationSettings(
+    @pytest.fixture(scope="module")
+    def cleared_settings(self):
+        """Create settings with every default cleared."""
+        return ApplicationSettings(
             id=1,
-            default_ai_model_id=1,
-            default_system_prompt_id=None,  # Cleared
-            default_user_profile_id=1,
-            default_avatar_image="/path/to/default/avatar.png",
-        )
-        mock_application_settings_repository.update_default_system_prompt.return_value = (
-            updated_settings
-        )
-
-        # Execute
-        result = service.update_default_system_prompt(prompt_id=None)
-
-        # Verify
-        assert result == updated_settings
-        mock_system_prompt_repository.get_by_id.assert_not_called()  # No need to check if None
-        mock_application_settings_repository.update_default_system_prompt.assert_called_once_with(
-            None
-        )
-
-    def test_update_default_system_prompt_not_found(
-        self,
-        service,
-        mock_application_settings_repository,
-        mock_system_prompt_repository,
-    ):
-        """Test updating with non-existent system prompt."""
-        # Setup
-        mock_system_prompt_repository.get_by_id.side_effect = ResourceNotFoundError(
-            "Not found"
+            default_ai_model_id=None,
+            default_system_prompt_id=None,
+            default_user_profile_id=None,
+            default_avatar_image=None,
         )
 
-        # Execute and verify
-        with pytest.raises(ResourceNotFoundError):
-            service.update_default_system_prompt(prompt_id=999)
-
-        # Verify repository method was not called
-        mock_application_settings_repository.update_default_system_prompt.assert_not_called()
-
-    def test_update_default_user_profile(
-        self,
-        service,
-        mock_application_settings_repository,
-        mock_user_profile_repository,
-        sample_settings,
+    def test_get_settings(
+        self, service, mock_application_settings_repository, sample_settings
     ):
-        """Test updating the default user profile."""
-        # Setup
-        mock_user_profile_repository.get_by_id.return_value = (
-            MagicMock()
-        )  # User profile exists
-        mock_application_settings_repository.update_default_user_profile.return_value = (
-            sample_settings
-        )
-
+        """Test getting application settings."""
         # Execute
-        result = service.update_default_user_profile(profile_id=1)
+        result = service.get_settings()
 
         # Verify
         assert result == sample_settings
-        mock_user_profile_repository.get_by_id.assert_called_once_with(1)
-        mock_application_settings_repository.update_default_user_profile.assert_called_once_with(
-            1
-        )
+        mock_application_settings_repository.get_settings.assert_called_once()
 
-    def test_update_default_user_profile_null(
+    @pytest.mark.parametrize(
+        "value,expect_check", [(1, True), (None, False)], ids=["set", "clear"]
+    )
+    @pytest.mark.parametrize(
+        "service_method,repo_fixture,arg_name", _DEFAULT_ENTITY_CASES
+    )
+    def test_update_default_entity(
         self,
+        request,
         service,
         mock_application_settings_repository,
-        mock_user_profile_repository,
         sample_settings,
+        service_method,
+        repo_fixture,
+        arg_name,
+        value,
+        expect_check,
     ):
-        """Test clearing the default user profile."""
+        """Test setting or clearing a default entity reference."""
         # Setup
-        updated_settings = ApplicationSettings(
-            id=1,
-            default_ai_model_id=1,
-            default_system_prompt_id=1,
-            default_user_profile_id=None,  # Cleared
-            default_avatar_image="/path/to/default/avatar.png",
-        )
-        mock_application_settings_repository.update_default_user_profile.return_value = (
-            updated_settings
-        )
+        entity_repository = request.getfixturevalue(repo_fixture)
+        entity_repository.get_by_id.return_value = _EXISTS
 
         # Execute
-        result = service.update_default_user_profile(profile_id=None)
-
-        # Verify
-        assert result == updated_settings
-        mock_user_profile_repository.get_by_id.assert_not_called()  # No need to check if None
-        mock_application_settings_repository.update_default_user_profile.assert_called_once_with(
-            None
-        )
+        result = getattr(service, service_method)(**{arg_name: value})
 
-    def test_update_default_user_profile_not_found(
+        # Verify - existence is only checked when an ID is provided
+        assert result == sample_settings
+        assert entity_repository.get_by_id.called is expect_check
+        getattr(
+            mock_application_settings_repository, service_method
+        ).assert_called_once_with(value)
+
+    @pytest.mark.parametrize(
+        "service_method,repo_fixture,kwargs,settings_method", _NOT_FOUND_CASES
+    )
+    def test_update_entity_not_found(
         self,
+        request,
         service,
         mock_application_settings_repository,
-        mock_user_profile_repository,
+        service_method,
+        repo_fixture,
+        kwargs,
+        settings_method,
     ):
-        """Test updating with non-existent user profile."""
+        """Test updating settings with a non-existent referenced entity."""
         # Setup
-        mock_user_profile_repository.get_by_id.side_effect = ResourceNotFoundError(
-            "Not found"
-        )
+        entity_repository = request.getfixturevalue(repo_fixture)
+        entity_repository.get_by_id.side_effect = _NOT_FOUND_ERR
 
         # Execute and verify
         with pytest.raises(ResourceNotFoundError):
-            service.update_default_user_profile(profile_id=999)
+            getattr(service, service_method)(**kwargs)
 
         # Verify repository method was not called
-        mock_application_settings_repository.update_default_user_profile.assert_not_called()
+        getattr(
+            mock_application_settings_repository, settings_method
+        ).assert_not_called()
 
     def test_update_default_avatar_image(
         self, service, mock_application_settings_repository, sample_settings
     ):
         """Test updating the default avatar image."""
-        # Setup
-        mock_application_settings_repository.update_default_avatar_image.return_value = (
-            sample_settings
-        )
-
         # Execute
         result = service.update_default_avatar_image(
             avatar_path="/path/to/default/avatar.png"
@@ -314,45 +249,32 @@ class TestApplicationSettingsService:
         )
 
     def test_update_default_avatar_image_null(
-        self, service, mock_application_settings_repository, sample_settings
+        self, service, mock_application_settings_repository, cleared_avatar_settings
     ):
         """Test clearing the default avatar image."""
         # Setup
-        updated_settings = ApplicationSettings(
-            id=1,
-            default_ai_model_id=1,
-            default_system_prompt_id=1,
-            default_user_profile_id=1,
-            default_avatar_image=None,  # Cleared
-        )
         mock_application_settings_repository.update_default_avatar_image.return_value = (
-            updated_settings
+            cleared_avatar_settings
         )
 
         # Execute
         result = service.update_default_avatar_image(avatar_path=None)
 
         # Verify
-        assert result == updated_settings
+        assert result == cleared_avatar_settings
         mock_application_settings_repository.update_default_avatar_image.assert_called_once_with(
             None
         )
 
-    def test_update_default_avatar_image_empty_string(
-        self, service, mock_application_settings_repository
+    @pytest.mark.parametrize("bad_value", ["", "   "], ids=["empty", "whitespace"])
+    def test_update_default_avatar_image_invalid(
+        self, service, mock_application_settings_repository, bad_value
     ):
-        """Test updating the default avatar image with empty string."""
+        """Test updating the default avatar image with a blank path."""
         # Execute and verify
-        with pytest.raises(ValidationError) as excinfo:
-            service.update_default_avatar_image(avatar_path="")
-
-        assert "default_avatar_image" in excinfo.value.details
-        mock_application_settings_repository.update_default_avatar_image.assert_not_called()
+        with pytest.raises(ValidationError, match="^INVALID_AVATAR_PATH: "):
+            service.update_default_avatar_image(avatar_path=bad_value)
 
-        with pytest.raises(ValidationError) as excinfo:
-            service.update_default_avatar_image(avatar_path="   ")
-
-        assert "default_avatar_image" in excinfo.value.details
         mock_application_settings_repository.update_default_avatar_image.assert_not_called()
 
     def test_update_settings(
@@ -366,16 +288,9 @@ class TestApplicationSettingsService:
     ):
         """Test updating multiple settings at once."""
         # Setup
-        mock_ai_model_repository.get_by_id.return_value = MagicMock()  # AI model exists
-        mock_system_prompt_repository.get_by_id.return_value = (
-            MagicMock()
-        )  # System prompt exists
-        mock_user_profile_repository.get_by_id.return_value = (
-            MagicMock()
-        )  # User profile exists
-        mock_application_settings_repository.save_settings.return_value = (
-            sample_settings
-        )
+        mock_ai_model_repository.get_by_id.return_value = _EXISTS
+        mock_system_prompt_repository.get_by_id.return_value = _EXISTS
+        mock_user_profile_repository.get_by_id.return_value = _EXISTS
 
         # Execute
         result = service.update_settings(
@@ -406,10 +321,7 @@ class TestApplicationSettingsService:
     ):
         """Test updating only some settings."""
         # Setup
-        mock_ai_model_repository.get_by_id.return_value = MagicMock()  # AI model exists
-        mock_application_settings_repository.save_settings.return_value = (
-            sample_settings
-        )
+        mock_ai_model_repository.get_by_id.return_value = _EXISTS
 
         # Execute - only update AI model and avatar
         result = service.update_settings(
@@ -417,9 +329,8 @@ class TestApplicationSettingsService:
             default_avatar_image="/path/to/default/avatar.png",
         )
 
-        # Verify
+        # Verify - only the provided fields are saved
         assert result == sample_settings
-        mock_ai_model_repository.get_by_id.assert_called_once_with(1)
         mock_application_settings_repository.save_settings.assert_called_once_with(
             default_ai_model_id=1,
             default_avatar_image="/path/to/default/avatar.png",
@@ -429,22 +340,12 @@ class TestApplicationSettingsService:
         self,
         service,
         mock_application_settings_repository,
-        mock_ai_model_repository,
-        mock_system_prompt_repository,
-        mock_user_profile_repository,
-        sample_settings,
+        cleared_settings,
     ):
         """Test updating settings with null values."""
         # Setup
-        updated_settings = ApplicationSettings(
-            id=1,
-            default_ai_model_id=None,  # Cleared
-            default_system_prompt_id=None,  # Cleared
-            default_user_profile_id=None,  # Cleared
-            default_avatar_image=None,  # Cleared
-        )
         mock_application_settings_repository.save_settings.return_value = (
-            updated_settings
+            cleared_settings
         )
 
         # Execute - set all values to None
@@ -456,7 +357,7 @@ class TestApplicationSettingsService:
         )
 
         # Verify
-        assert result == updated_settings
+        assert result == cleared_settings
         mock_application_settings_repository.save_settings.assert_called_once_with(
             default_ai_model_id=None,
             default_system_prompt_id=None,
@@ -468,51 +369,17 @@ class TestApplicationSettingsService:
         self,
         service,
         mock_application_settings_repository,
+        mock_ai_model_repository,
         sample_settings,
     ):
         """Test update settings with no changes."""
-        # Setup
-        mock_application_settings_repository.get_settings.return_value = sample_settings
-
-        # Patch the update_settings method to ensure it returns get_settings()
-        # when called without arguments
-        with patch.object(
-            service,
-            "update_settings",
-            wraps=lambda *args, **kwargs: (
-                service.repository.get_settings()
-                if not kwargs
-                else service.repository.save_settings(**kwargs)
-            ),
-        ):
-            # Execute - no changes
-            result = service.update_settings()
-
-            # Verify
-            assert result == sample_settings
-            mock_application_settings_repository.get_settings.assert_called_once()
-            mock_application_settings_repository.save_settings.assert_not_called()
-
-    def test_update_settings_entity_not_found(
-        self,
-        service,
-        mock_application_settings_repository,
-        mock_ai_model_repository,
-    ):
-        """Test updating settings with non-existent entity."""
-        # Setup
-        mock_ai_model_repository.get_by_id.side_effect = ResourceNotFoundError(
-            "Not found"
-        )
-
-        # Execute and verify
-        with pytest.raises(ResourceNotFoundError):
-            service.update_settings(
-                default_ai_model_id=999,  # Non-existent
-            )
+        # Execute - no changes
+        result = service.update_settings()
 
-        # Verify repository method was not called
-        mock_application_settings_repository.save_settings.assert_not_called()
+        # Verify - nothing to validate, settings are saved unchanged
+        assert result == sample_settings
+        mock_ai_model_repository.get_by_id.assert_not_called()
+        mock_application_settings_repository.save_settings.assert_called_once_with()
 
     def test_update_settings_validation_error(
         self,
@@ -521,36 +388,30 @@ class TestApplicationSettingsService:
     ):
         """Test updating settings with invalid values."""
         # Execute and verify - empty avatar path
-        with pytest.raises(ValidationError) as excinfo:
+        with pytest.raises(ValidationError, match="^INVALID_AVATAR_PATH: "):
             service.update_settings(
                 default_avatar_image="",  # Empty string
             )
 
-        assert "default_avatar_image" in excinfo.value.details
         mock_application_settings_repository.save_settings.assert_not_called()
 
     def test_reset_settings(
         self,
         service,
         mock_application_settings_repository,
-        sample_settings,
+        cleared_settings,
     ):
         """Test resetting settings to defaults."""
         # Setup
-        reset_settings = ApplicationSettings(
-            id=1,
-            default_ai_model_id=None,
-            default_system_prompt_id=None,
-            default_user_profile_id=None,
-            default_avatar_image=None,
+        mock_application_settings_repository.save_settings.return_value = (
+            cleared_settings
         )
-        mock_application_settings_repository.save_settings.return_value = reset_settings
 
         # Execute
         result = service.reset_settings()
 
         # Verify
-        assert result == reset_settings
+        assert result == cleared_settings
         mock_application_settings_repository.save_settings.assert_called_once_with(
             default_ai_model_id=None,
             default_system_prompt_id=None,
@@ -559,161 +420,150 @@ class TestApplicationSettingsService:
             default_formatting_rules=None,
         )
 
-    # OpenRouter API Key Tests
-
-    @patch("app.services.application_settings_service.encryption_service")
-    def test_set_openrouter_api_key_success(
-        self,
-        mock_encryption_service,
-        service,
-        mock_application_settings_repository,
-        sample_settings,
-    ):
-        """Test successfully setting OpenRouter API key."""
-        # Setup
-        api_key = "sk-or-test-api-key-123"
-        encrypted_key = "encrypted_api_key_data"
-        mock_encryption_service.encrypt_api_key.return_value = encrypted_key
-        mock_application_settings_repository.save_settings.return_value = (
-            sample_settings
-        )
-
-        # Execute
-        result = service.set_openrouter_api_key(api_key)
+    class TestOpenRouterApiKey:
+        """Test OpenRouter API key storage with a patched encryption service."""
 
-        # Verify
-        assert result == sample_settings
-        mock_encryption_service.encrypt_api_key.assert_called_once_with(api_key)
-        mock_application_settings_repository.save_settings.assert_called_once_with(
-            openrouter_api_key_encrypted=encrypted_key
-        )
+        @pytest.fixture(autouse=True)
+        def mock_encryption_service(self):
+            """Patch the encryption service used by the settings service."""
+            with patch.object(settings_service_module, "encryption_service") as mock:
+                yield mock
 
-    @patch("app.services.application_settings_service.encryption_service")
-    def test_set_openrouter_api_key_empty_string(
-        self,
-        mock_encryption_service,
-        service,
-        mock_application_settings_repository,
-    ):
-        """Test setting empty OpenRouter API key raises validation error."""
-        with pytest.raises(ValidationError, match="OpenRouter API key cannot be empty"):
-            service.set_openrouter_api_key("")
+        def test_set_openrouter_api_key_success(
+            self,
+            mock_encryption_service,
+            service,
+            mock_application_settings_repository,
+            sample_settings,
+        ):
+            """Test successfully setting OpenRouter API key."""
+            # Setup
+            api_key = "sk-or-test-api-key-123"
+            encrypted_key = "encrypted_api_key_data"
+            mock_encryption_service.encrypt_api_key.return_value = encrypted_key
 
-        mock_encryption_service.encrypt_api_key.assert_not_called()
-        mock_application_settings_repository.save_settings.assert_not_called()
+            # Execute
+            result = service.set_openrouter_api_key(api_key)
 
-    @patch("app.services.application_settings_service.encryption_service")
-    def test_set_openrouter_api_key_whitespace_only(
-        self,
-        mock_encryption_service,
-        service,
-        mock_application_settings_repository,
-    ):
-        """Test setting whitespace-only OpenRouter API key raises validation error."""
-        with pytest.raises(ValidationError, match="OpenRouter API key cannot be empty"):
-            service.set_openrouter_api_key("   ")
+            # Verify
+            assert result == sample_settings
+            mock_encryption_service.encrypt_api_key.assert_called_once_with(api_key)
+            mock_application_settings_repository.save_settings.assert_called_once_with(
+                openrouter_api_key_encrypted=encrypted_key
+            )
 
-        mock_encryption_service.encrypt_api_key.assert_not_called()
-        mock_application_settings_repository.save_settings.assert_not_called()
+        @pytest.mark.parametrize("bad_value", ["", "   "], ids=["empty", "whitespace"])
+        def test_set_openrouter_api_key_blank(
+            self,
+            mock_encryption_service,
+            service,
+            mock_application_settings_repository,
+            bad_value,
+        ):
+            """Test setting a blank OpenRouter API key raises validation error."""
+            with pytest.raises(
+                ValidationError, match="OpenRouter API key cannot be empty"
+            ):
+                service.set_openrouter_api_key(bad_value)
 
-    @patch("app.services.application_settings_service.encryption_service")
-    def test_set_openrouter_api_key_encryption_failure(
-        self,
-        mock_encryption_service,
-        service,
-        mock_application_settings_repository,
-    ):
-        """Test handling encryption failure when setting API key."""
-        # Setup
-        api_key = "sk-or-test-api-key-123"
-        mock_encryption_service.encrypt_api_key.side_effect = Exception(
-            "Encryption failed"
-        )
+            mock_encryption_service.encrypt_api_key.assert_not_called()
+            mock_application_settings_repository.save_settings.assert_not_called()
 
-        # Execute & Verify
-        with pytest.raises(ValidationError, match="Failed to encrypt API key"):
-            service.set_openrouter_api_key(api_key)
+        def test_set_openrouter_api_key_encryption_failure(
+            self,
+            mock_encryption_service,
+            service,
+            mock_application_settings_repository,
+        ):
+            """Test handling encryption failure when setting API key."""
+            # Setup
+            api_key = "sk-or-test-api-key-123"
+            mock_encryption_service.encrypt_api_key.side_effect = Exception(
+                "Encryption failed"
+            )
 
-        mock_application_settings_repository.save_settings.assert_not_called()
+            # Execute & Verify
+            with pytest.raises(ValidationError, match="Failed to encrypt API key"):
+                service.set_openrouter_api_key(api_key)
 
-    @patch("app.services.application_settings_service.encryption_service")
-    def test_get_openrouter_api_key_success(
-        self,
-        mock_encryption_service,
-        service,
-        mock_application_settings_repository,
-    ):
-        """Test successfully getting OpenRouter API key."""
-        # Setup
-        encrypted_key = "encrypted_api_key_data"
-        decrypted_key = "sk-or-test-api-key-123"
-        settings = ApplicationSettings(id=1, openrouter_api_key_encrypted=encrypted_key)
-        mock_application_settings_repository.get_settings.return_value = settings
-        mock_encryption_service.decrypt_api_key.return_value = decrypted_key
+            mock_application_settings_repository.save_settings.assert_not_called()
 
-        # Execute
-        result = service.get_openrouter_api_key()
+        def test_get_openrouter_api_key_success(
+            self,
+            mock_encryption_service,
+            service,
+            mock_application_settings_repository,
+        ):
+            """Test successfully getting OpenRouter API key."""
+            # Setup
+            encrypted_key = "encrypted_api_key_data"
+            decrypted_key = "sk-or-test-api-key-123"
+            settings = ApplicationSettings(
+                id=1, openrouter_api_key_encrypted=encrypted_key
+            )
+            mock_application_settings_repository.get_settings.return_value = settings
+            mock_encryption_service.decrypt_api_key.return_value = decrypted_key
 
-        # Verify
-        assert result == decrypted_key
-        mock_encryption_service.decrypt_api_key.assert_called_once_with(encrypted_key)
+            # Execute
+            result = service.get_openrouter_api_key()
 
-    @patch("app.services.application_settings_service.encryption_service")
-    def test_get_openrouter_api_key_no_key_stored(
-        self,
-        mock_encryption_service,
-        service,
-        mock_application_settings_repository,
-    ):
-        """Test getting OpenRouter API key when none is stored."""
-        # Setup
-        settings = ApplicationSettings(id=1, openrouter_api_key_encrypted=None)
-        mock_application_settings_repository.get_settings.return_value = settings
+            # Verify
+            assert result == decrypted_key
+            mock_encryption_service.decrypt_api_key.assert_called_once_with(
+                encrypted_key
+            )
 
-        # Execute
-        result = service.get_openrouter_api_key()
+        def test_get_openrouter_api_key_no_key_stored(
+            self,
+            mock_encryption_service,
+            service,
+            mock_application_settings_repository,
+        ):
+            """Test getting OpenRouter API key when none is stored."""
+            # Setup
+            settings = ApplicationSettings(id=1, openrouter_api_key_encrypted=None)
+            mock_application_settings_repository.get_settings.return_value = settings
 
-        # Verify
-        assert result is None
-        mock_encryption_service.decrypt_api_key.assert_not_called()
+            # Execute
+            result = service.get_openrouter_api_key()
 
-    @patch("app.services.application_settings_service.encryption_service")
-    def test_get_openrouter_api_key_decryption_failure(
-        self,
-        mock_encryption_service,
-        service,
-        mock_application_settings_repository,
-    ):
-        """Test handling decryption failure when getting API key."""
-        # Setup
-        encrypted_key = "encrypted_api_key_data"
-        settings = ApplicationSettings(id=1, openrouter_api_key_encrypted=encrypted_key)
-        mock_application_settings_repository.get_settings.return_value = settings
-        mock_encryption_service.decrypt_api_key.side_effect = Exception(
-            "Decryption failed"
-        )
+            # Verify
+            assert result is None
+            mock_encryption_service.decrypt_api_key.assert_not_called()
 
-        # Execute & Verify
-        with pytest.raises(ValidationError, match="Failed to decrypt API key"):
-            service.get_openrouter_api_key()
+        def test_get_openrouter_api_key_decryption_failure(
+            self,
+            mock_encryption_service,
+            service,
+            mock_application_settings_repository,
+        ):
+            """Test handling decryption failure when getting API key."""
+            # Setup
+            encrypted_key = "encrypted_api_key_data"
+            settings = ApplicationSettings(
+                id=1, openrouter_api_key_encrypted=encrypted_key
+            )
+            mock_application_settings_repository.get_settings.return_value = settings
+            mock_encryption_service.decrypt_api_key.side_effect = Exception(
+                "Decryption failed"
+            )
 
-    def test_clear_openrouter_api_key_success(
-        self,
-        service,
-        mock_application_settings_repository,
-        sample_settings,
-    ):
-        """Test successfully clearing OpenRouter API key."""
-        # Setup
-        mock_application_settings_repository.save_settings.return_value = (
-            sample_settings
-        )
+            # Execute & Verify
+            with pytest.raises(ValidationError, match="Failed to decrypt API key"):
+                service.get_openrouter_api_key()
 
-        # Execute
-        result = service.clear_openrouter_api_key()
+        def test_clear_openrouter_api_key_success(
+            self,
+            service,
+            mock_application_settings_repository,
+            sample_settings,
+        ):
+            """Test successfully clearing OpenRouter API key."""
+            # Execute
+            result = service.clear_openrouter_api_key()
 
-        # Verify
-        assert result == sample_settings
-        mock_application_settings_repository.save_settings.assert_called_once_with(
-            openrouter_api_key_encrypted=None
-        )
+            # Verify
+            assert result == sample_settings
+            mock_application_settings_repository.save_settings.assert_called_once_with(
+                openrouter_api_key_encrypted=None
+            )
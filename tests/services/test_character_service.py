@@ -5,9 +5,52 @@ from unittest.mock import MagicMock
 import pytest
 
 from app.models.character import Character
-from app.services.character_service import CharacterService
+from app.repositories.character_repository import CharacterRepository
 from app.utils.exceptions import ValidationError
 
+_SAMPLE_KWARGS = {
+    "id": 1,
+    "label": "test_char",
+    "name": "Test Character",
+    "avatar_image": "test.png",
+    "description": "A test character",
+}
+_UPDATED_KWARGS = {
+    "id": 1,
+    "label": "updated_char",
+    "name": "Updated Character",
+    "avatar_image": "new.png",
+    "description": "Updated description",
+}
+_UPDATE_FIELDS = {k: v for k, v in _UPDATED_KWARGS.items() if k != "id"}
+
+# (input_kwargs, label_owner_id, expected_update_kwargs,
+#  expect_avatar_deletion, error_match)
+_UPDATE_CASES = [
+    pytest.param(_UPDATE_FIELDS, None, _UPDATE_FIELDS, True, id="new_avatar"),
+    pytest.param(
+        {**_UPDATE_FIELDS, "avatar_image": "test.png"},
+        None,
+        {**_UPDATE_FIELDS, "avatar_image": "test.png"},
+        False,
+        id="avatar_same",
+    ),
+    pytest.param(
+        {"name": "Updated Character"},
+        None,
+        {"name": "Updated Character"},
+        False,
+        id="partial",
+    ),
+    pytest.param(
+        {"label": "test_char", "name": "Updated Character"},
+        1,  # Label belongs to the character itself, so it is not re-sent
+        {"name": "Updated Character"},
+        False,
+        id="same_label",
+    ),
+]
+
 
 class TestCharacterService:
     """Test the CharacterService functionality."""
@@ -15,23 +58,30 @@ class TestCharacterService:
     @pytest.fixture
     def mock_repository(self):
         """Create a mock character repository."""
-        return MagicMock()
+        return MagicMock(spec=CharacterRepository)
+
+    @pytest.fixture(autouse=True)
+    def file_upload_service_cls(self, mocker):
+        """Patch FileUploadService for every test so no avatar files are touched."""
+        return mocker.patch("app.services.character_service.FileUploadService")
+
+    @pytest.fixture
+    def file_service(self, file_upload_service_cls):
+        """Return the FileUploadService instance the service will construct."""
+        return file_upload_service_cls.return_value
 
     @pytest.fixture
     def service(self, mock_repository):
         """Create a CharacterService with a mock repository."""
+        # Deferred so collection does not import FileUploadService and PIL
+        from app.services.character_service import CharacterService
+
         return CharacterService(mock_repository)
 
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def sample_character(self):
-        """Create a sample character for testing."""
-        return Character(
-            id=1,
-            label="test_char",
-            name="Test Character",
-            avatar_image="test.png",
-            description="A test character",
-        )
+        """Create a sample character shared by the module; tests only read it."""
+        return Character(**_SAMPLE_KWARGS)
 
     def test_get_character(self, service, mock_repository, sample_character):
         """Test getting a character by ID."""
@@ -81,13 +131,11 @@ class TestCharacterService:
         assert result == [sample_character]
         mock_repository.search.assert_called_once_with("test")
 
-    def test_search_characters_validation(self, service):
+    @pytest.mark.parametrize("query", ["", "a"])
+    def test_search_characters_validation(self, service, query):
         """Test search validation for short queries."""
         with pytest.raises(ValidationError):
-            service.search_characters("")
-
-        with pytest.raises(ValidationError):
-            service.search_characters("a")
+            service.search_characters(query)
 
     def test_create_character(self, service, mock_repository):
         """Test creating a character."""
@@ -122,259 +170,134 @@ class TestCharacterService:
         mock_repository.get_by_label.return_value = sample_character
 
         # Execute & Verify
-        with pytest.raises(ValidationError) as excinfo:
+        with pytest.raises(ValidationError, match="already exists"):
             service.create_character(
                 label="test_char", name="New Character"  # Already exists
             )
 
-        assert "already exists" in str(excinfo.value)
         mock_repository.create.assert_not_called()
 
-    def test_create_character_validation_errors(self, service, mock_repository):
+    @pytest.mark.parametrize(
+        "label,name,expected_field,expected_substring",
+        [
+            pytest.param("", "Test", "label", "required", id="empty_label"),
+            pytest.param(
+                "a", "Test", "label", "at least 2 characters", id="short_label"
+            ),
+            pytest.param("test", "", "name", "required", id="empty_name"),
+        ],
+    )
+    def test_create_character_validation_errors(
+        self, service, mock_repository, label, name, expected_field, expected_substring
+    ):
         """Test character creation validation."""
         # Setup
         mock_repository.get_by_label.return_value = None
 
-        # Test empty label
-        with pytest.raises(ValidationError) as excinfo:
-            service.create_character(label="", name="Test")
-
-        assert "Character validation failed" in str(excinfo.value)
-        assert "required" in str(excinfo.value.details.get("label", ""))
-
-        # Test short label
-        with pytest.raises(ValidationError) as excinfo:
-            service.create_character(label="a", name="Test")
-
-        assert "Character validation failed" in str(excinfo.value)
-        assert "at least 2 characters" in str(excinfo.value.details.get("label", ""))
-
-        # Test empty name
-        with pytest.raises(ValidationError) as excinfo:
-            service.create_character(label="test", name="")
+        # Execute & Verify
+        with pytest.raises(
+            ValidationError, match="Character validation failed"
+        ) as excinfo:
+            service.create_character(label=label, name=name)
 
-        assert "Character validation failed" in str(excinfo.value)
-        assert "required" in str(excinfo.value.details.get("name", ""))
+        assert expected_substring in str(excinfo.value.details.get(expected_field, ""))
 
-        # Verify repository not called for any validation failures
+        # Verify repository not called for validation failures
         mock_repository.create.assert_not_called()
 
-    def test_update_character(self, service, mock_repository, sample_character, mocker):
-        """Test updating a character."""
-        # Setup
-        mock_repository.get_by_id.return_value = sample_character
-        mock_repository.get_by_label.return_value = None  # No conflict with new label
-
-        # Mock FileUploadService
-        mock_file_service = mocker.patch(
-            "app.services.character_service.FileUploadService"
-        )
-        mock_file_service_instance = mock_file_service.return_value
-
-        updated_character = Character(
-            id=1,
-            label="updated_char",
-            name="Updated Character",
-            avatar_image="new.png",
-            description="Updated description",
-        )
-        mock_repository.update.return_value = updated_character
-
-        # Execute
-        result = service.update_character(
-            character_id=1,
-            label="updated_char",
-            name="Updated Character",
-            avatar_image="new.png",
-            description="Updated description",
-        )
-
-        # Verify
-        assert result == updated_character
-        mock_repository.update.assert_called_once_with(
-            1,
-            label="updated_char",
-            name="Updated Character",
-            avatar_image="new.png",
-            description="Updated description",
-        )
-        # Should delete old avatar when updating to new one
-        mock_file_service_instance.delete_avatar_image.assert_called_once_with(
-            "test.png"
-        )
-
-    def test_update_character_avatar_same(
-        self, service, mock_repository, sample_character, mocker
+    @pytest.mark.parametrize(
+        "input_kwargs,label_owner_id,expected_update_kwargs,expect_avatar_deletion",
+        _UPDATE_CASES,
+    )
+    def test_update_character(
+        self,
+        service,
+        mock_repository,
+        sample_character,
+        file_service,
+        input_kwargs,
+        label_owner_id,
+        expected_update_kwargs,
+        expect_avatar_deletion,
     ):
-        """Test updating character with same avatar doesn't delete file."""
+        """Test updating a character across label, avatar and partial changes."""
         # Setup
         mock_repository.get_by_id.return_value = sample_character
-        mock_repository.get_by_label.return_value = None
-
-        # Mock FileUploadService
-        mock_file_service = mocker.patch(
-            "app.services.character_service.FileUploadService"
-        )
-        mock_file_service_instance = mock_file_service.return_value
-
-        updated_character = Character(
-            id=1,
-            label="updated_char",
-            name="Updated Character",
-            avatar_image="test.png",  # Same as original
-            description="Updated description",
+        mock_repository.get_by_label.return_value = (
+            None
+            if label_owner_id is None
+            else Character(
+                id=label_owner_id,
+                label=input_kwargs["label"],
+                name="Existing Character",
+            )
         )
+        updated_character = Character(**{**_SAMPLE_KWARGS, **input_kwargs})
         mock_repository.update.return_value = updated_character
 
         # Execute
-        result = service.update_character(
-            character_id=1,
-            label="updated_char",
-            name="Updated Character",
-            avatar_image="test.png",  # Same avatar
-            description="Updated description",
-        )
-
-        # Verify - should not delete avatar file since it's the same
-        assert result == updated_character
-        mock_file_service_instance.delete_avatar_image.assert_not_called()
-
-    def test_update_character_partial(self, service, mock_repository, sample_character):
-        """Test partially updating a character."""
-        # Setup
-        mock_repository.get_by_id.return_value = sample_character
-
-        updated_character = Character(
-            id=1,
-            label="test_char",  # Unchanged
-            name="Updated Character",  # Only name is updated
-            avatar_image="test.png",  # Unchanged
-            description="A test character",  # Unchanged
-        )
-        mock_repository.update.return_value = updated_character
-
-        # Execute - only update name
-        result = service.update_character(character_id=1, name="Updated Character")
+        result = service.update_character(character_id=1, **input_kwargs)
 
         # Verify
         assert result == updated_character
-        mock_repository.update.assert_called_once_with(1, name="Updated Character")
+        mock_repository.update.assert_called_once_with(1, **expected_update_kwargs)
+
+        # The old avatar is only deleted when replaced by a different one
+        if expect_avatar_deletion:
+            file_service.delete_avatar_image.assert_called_once_with("test.png")
+        else:
+            file_service.delete_avatar_image.assert_not_called()
 
     def test_update_character_label_exists(
-        self, service, mock_repository, sample_character
+        self, service, mock_repository, sample_character, file_service
     ):
-        """Test updating a character with a label that already exists on another character."""
+        """Test updating a character to a label used by another character."""
         # Setup
         mock_repository.get_by_id.return_value = sample_character
-
-        # Another character with the label we want to use
-        existing_character = Character(
-            id=2, label="existing_label", name="Existing Character"  # Different ID
+        mock_repository.get_by_label.return_value = Character(
+            id=2, label="existing_label", name="Existing Character"
         )
-        mock_repository.get_by_label.return_value = existing_character
 
         # Execute & Verify
-        with pytest.raises(ValidationError) as excinfo:
-            service.update_character(
-                character_id=1,
-                label="existing_label",  # Already used by character with ID 2
-            )
+        with pytest.raises(ValidationError, match="already exists"):
+            service.update_character(character_id=1, label="existing_label")
 
-        assert "already exists" in str(excinfo.value)
         mock_repository.update.assert_not_called()
-
-    def test_update_character_same_label(
-        self, service, mock_repository, sample_character
+        file_service.delete_avatar_image.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "avatar,expect_delete_call",
+        [
+            pytest.param("test.png", True, id="with_avatar"),
+            pytest.param(None, False, id="no_avatar"),
+        ],
+    )
+    def test_delete_character(
+        self, service, mock_repository, file_service, avatar, expect_delete_call
     ):
-        """Test updating a character with its own label is allowed."""
-        # Setup
-        mock_repository.get_by_id.return_value = sample_character
-        mock_repository.get_by_label.return_value = sample_character  # Same character
-
-        updated_character = Character(
-            id=1,
-            label="test_char",  # Same label
-            name="Updated Character",  # Only name is updated
-            avatar_image="test.png",
-            description="A test character",
-        )
-        mock_repository.update.return_value = updated_character
-
-        # Execute - update name but keep same label
-        result = service.update_character(
-            character_id=1,
-            label="test_char",  # Same as current
-            name="Updated Character",
-        )
-
-        # Verify - update should succeed since label belongs to same character
-        assert result == updated_character
-        mock_repository.update.assert_called_once_with(
-            1,
-            name="Updated Character",  # Label not included in update since it's the same
-        )
-
-    def test_delete_character(self, service, mock_repository, sample_character, mocker):
-        """Test deleting a character."""
+        """Test deleting a character removes its avatar file only if it has one."""
         # Setup
-        mock_repository.get_by_id.return_value = sample_character
-
-        # Patch the count method to return zero
-        mocker.patch("sqlalchemy.orm.dynamic.AppenderQuery.count", return_value=0)
-
-        # Mock FileUploadService
-        mock_file_service = mocker.patch(
-            "app.services.character_service.FileUploadService"
-        )
-        mock_file_service_instance = mock_file_service.return_value
-
-        # Execute
-        service.delete_character(1)
-
-        # Verify
-        mock_repository.delete.assert_called_once_with(1)
-        mock_file_service_instance.delete_avatar_image.assert_called_once_with(
-            "test.png"
+        mock_repository.get_by_id.return_value = Character(
+            **{**_SAMPLE_KWARGS, "avatar_image": avatar}
         )
 
-    def test_delete_character_no_avatar(self, service, mock_repository, mocker):
-        """Test deleting a character without avatar doesn't try to delete file."""
-        # Setup - character without avatar
-        character_no_avatar = Character(
-            id=1,
-            label="test_char",
-            name="Test Character",
-            avatar_image=None,
-            description="A test character",
-        )
-        mock_repository.get_by_id.return_value = character_no_avatar
-
-        # Patch the count method to return zero
-        mocker.patch("sqlalchemy.orm.dynamic.AppenderQuery.count", return_value=0)
-
-        # Mock FileUploadService
-        mock_file_service = mocker.patch(
-            "app.services.character_service.FileUploadService"
-        )
-        mock_file_service_instance = mock_file_service.return_value
-
         # Execute
         service.delete_character(1)
 
         # Verify
         mock_repository.delete.assert_called_once_with(1)
-        mock_file_service_instance.delete_avatar_image.assert_not_called()
+        if expect_delete_call:
+            file_service.delete_avatar_image.assert_called_once_with("test.png")
+        else:
+            file_service.delete_avatar_image.assert_not_called()
 
     def test_delete_character_without_chat_session_service(
-        self, service, mock_repository, sample_character, mocker
+        self, service, mock_repository, sample_character
     ):
         """Test deleting character without chat session service (backward compatibility)."""
         # Setup
         mock_repository.get_by_id.return_value = sample_character
 
-        # Mock file service
-        mocker.patch("app.services.character_service.FileUploadService")
-
         # Execute - should work even without chat session service (old behavior)
         service.delete_character(1)
 
@@ -393,9 +316,6 @@ class TestCharacterService:
         mock_sessions = [mocker.MagicMock(id=1), mocker.MagicMock(id=2)]
         mock_chat_service.get_sessions_by_character.return_value = mock_sessions
 
-        # Mock file service
-        mocker.patch("app.services.character_service.FileUploadService")
-
         # Execute
         service.delete_character(1, mock_chat_service)
 
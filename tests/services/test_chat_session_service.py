@@ -1,85 +1,123 @@
 """Tests for the ChatSessionService class."""
 
 from datetime import datetime
-from unittest.mock import MagicMock, call, patch
+from types import SimpleNamespace
+from unittest.mock import MagicMock, call
 
 import pytest
 
 from app.models.chat_session import ChatSession
-from app.services.chat_session_service import ChatSessionService
 from app.utils.exceptions import ResourceNotFoundError, ValidationError
 
+_NOT_FOUND_ERR = ResourceNotFoundError("Not found")
+
+# Stand-in for "entity exists": the service only checks get_by_id doesn't raise
+_EXISTS = object()
+# Character with no first messages, for paths that read character.first_messages
+_CHARACTER_WITHOUT_GREETING = SimpleNamespace(first_messages=[])
+
+_START_TIME = datetime(2024, 1, 1)
+_UPDATED_AT = datetime(2024, 1, 2)
+
+
+def _freeze_utcnow(monkeypatch, now):
+    """Make the service's datetime.utcnow() return ``now`` for this test."""
+    monkeypatch.setattr(
+        "app.services.chat_session_service.datetime",
+        SimpleNamespace(utcnow=lambda: now),
+    )
+
+
+def _assert_calls(*expected):
+    """Assert each (mock, calls) pair received exactly ``calls``, in order."""
+    for mock, calls in expected:
+        assert mock.call_args_list == calls, mock
+
+
+# Entities a chat session refers to, by repository fixture name
+_SESSION_ENTITIES = ("character", "user_profile", "ai_model", "system_prompt")
+
+
+# (service_method, repo_fixture, kwargs, chat_session_repo_method)
+_NOT_FOUND_CASES = [
+    pytest.param(
+        "get_sessions_by_character",
+        "mock_character_repository",
+        {"character_id": 999},
+        "get_sessions_by_character_id",
+        id="sessions_by_character",
+    ),
+    pytest.param(
+        "get_sessions_by_user_profile",
+        "mock_user_profile_repository",
+        {"profile_id": 999},
+        "get_sessions_by_user_profile_id",
+        id="sessions_by_user_profile",
+    ),
+    pytest.param(
+        "create_session",
+        "mock_character_repository",
+        {
+            "character_id": 999,  # Non-existent
+            "user_profile_id": 1,
+            "ai_model_id": 1,
+            "system_prompt_id": 1,
+        },
+        "create",
+        id="create_session",
+    ),
+    pytest.param(
+        "delete_session",
+        "mock_chat_session_repository",
+        {"session_id": 999},
+        "delete",
+        id="delete_session",
+    ),
+]
+
 
 class TestChatSessionService:
     """Test the ChatSessionService functionality."""
 
     @pytest.fixture
-    def mock_chat_session_repository(self):
-        """Create a mock chat session repository."""
-        return MagicMock()
-
-    @pytest.fixture
-    def mock_character_repository(self):
-        """Create a mock character repository."""
-        return MagicMock()
-
-    @pytest.fixture
-    def mock_user_profile_repository(self):
-        """Create a mock user profile repository."""
-        return MagicMock()
-
-    @pytest.fixture
-    def mock_ai_model_repository(self):
-        """Create a mock AI model repository."""
-        return MagicMock()
-
-    @pytest.fixture
-    def mock_system_prompt_repository(self):
-        """Create a mock system prompt repository."""
-        return MagicMock()
-
-    @pytest.fixture
-    def mock_application_settings_repository(self):
-        """Create a mock application settings repository."""
-        return MagicMock()
-
-    @pytest.fixture
-    def service(
-        self,
-        mock_chat_session_repository,
-        mock_character_repository,
-        mock_user_profile_repository,
-        mock_ai_model_repository,
-        mock_system_prompt_repository,
-        mock_application_settings_repository,
-    ):
-        """Create a ChatSessionService with mock repositories."""
-        return ChatSessionService(
-            mock_chat_session_repository,
-            mock_character_repository,
-            mock_user_profile_repository,
-            mock_ai_model_repository,
-            mock_system_prompt_repository,
-            mock_application_settings_repository,
-        )
+    def service(self, chat_session_service):
+        """Use the shared ChatSessionService from the services conftest."""
+        return chat_session_service
 
-    @pytest.fixture
+    @pytest.fixture(scope="module")
     def sample_session(self):
-        """Create a sample chat session for testing."""
+        """Create a sample chat session shared by the module; tests only read it."""
         return ChatSession(
             id=1,
             character_id=1,
             user_profile_id=1,
             ai_model_id=1,
             system_prompt_id=1,
-            start_time=datetime.utcnow(),
-            updated_at=datetime.utcnow(),
+            start_time=_START_TIME,
+            updated_at=_START_TIME,
             pre_prompt="Optional pre-prompt",
             pre_prompt_enabled=True,
             post_prompt="Optional post-prompt",
             post_prompt_enabled=False,
         )
 
+    @pytest.fixture
+    def existing_entities(self, request, service):
+        """Provide the service with the named entities' get_by_id returning _EXISTS.
+
+        Parametrize indirectly with a sequence of entity names; defaults to
+        every entity a session refers to. The get_by_id of the other session
+        entities raises ResourceNotFoundError.
+        """
+        existing = getattr(request, "param", _SESSION_ENTITIES)
+        for name in _SESSION_ENTITIES:
+            repository = request.getfixturevalue(f"mock_{name}_repository")
+            if name in existing:
+                repository.get_by_id.return_value = _EXISTS
+            else:
+                repository.get_by_id.side_effect = _NOT_FOUND_ERR
+        return service
+
     def test_get_session(self, service, mock_chat_session_repository, sample_session):
         """Test getting a chat session by ID."""
         # Setup
@@ -117,9 +155,7 @@ class TestChatSessionService:
     ):
         """Test getting all sessions for a character."""
         # Setup
-        mock_character_repository.get_by_id.return_value = (
-            MagicMock()
-        )  # Character exists
+        mock_character_repository.get_by_id.return_value = _EXISTS  # Character exists
         mock_chat_session_repository.get_sessions_by_character_id.return_value = [
             sample_session
         ]
@@ -134,22 +170,6 @@ class TestChatSessionService:
             1
         )
 
-    def test_get_sessions_by_character_not_found(
-        self, service, mock_chat_session_repository, mock_character_repository
-    ):
-        """Test getting sessions for non-existent character."""
-        # Setup
-        mock_character_repository.get_by_id.side_effect = ResourceNotFoundError(
-            "Not found"
-        )
-
-        # Execute and verify
-        with pytest.raises(ResourceNotFoundError):
-            service.get_sessions_by_character(999)
-
-        # Verify repository method was not called
-        mock_chat_session_repository.get_sessions_by_character_id.assert_not_called()
-
     def test_get_sessions_by_user_profile(
         self,
         service,
@@ -159,9 +179,7 @@ class TestChatSessionService:
     ):
         """Test getting all sessions for a user profile."""
         # Setup
-        mock_user_profile_repository.get_by_id.return_value = (
-            MagicMock()
-        )  # Profile exists
+        mock_user_profile_repository.get_by_id.return_value = _EXISTS  # Profile exists
         mock_chat_session_repository.get_sessions_by_user_profile_id.return_value = [
             sample_session
         ]
@@ -176,55 +194,64 @@ class TestChatSessionService:
             1
         )
 
-    def test_get_sessions_by_user_profile_not_found(
-        self, service, mock_chat_session_repository, mock_user_profile_repository
+    @pytest.mark.parametrize(
+        "service_method,repo_fixture,kwargs,chat_session_method", _NOT_FOUND_CASES
+    )
+    def test_entity_not_found(
+        self,
+        request,
+        service,
+        mock_chat_session_repository,
+        service_method,
+        repo_fixture,
+        kwargs,
+        chat_session_method,
     ):
-        """Test getting sessions for non-existent user profile."""
+        """Test operations on a non-existent entity raise before touching sessions."""
         # Setup
-        mock_user_profile_repository.get_by_id.side_effect = ResourceNotFoundError(
-            "Not found"
-        )
+        entity_repository = request.getfixturevalue(repo_fixture)
+        entity_repository.get_by_id.side_effect = _NOT_FOUND_ERR
 
         # Execute and verify
         with pytest.raises(ResourceNotFoundError):
-            service.get_sessions_by_user_profile(999)
+            getattr(service, service_method)(**kwargs)
 
         # Verify repository method was not called
-        mock_chat_session_repository.get_sessions_by_user_profile_id.assert_not_called()
+        getattr(mock_chat_session_repository, chat_session_method).assert_not_called()
 
+    @pytest.mark.parametrize("limit", [1, 5])
     def test_get_recent_sessions(
-        self, service, mock_chat_session_repository, sample_session
+        self, service, mock_chat_session_repository, sample_session, limit
     ):
-        """Test getting recent sessions."""
+        """Test getting recent sessions, including the smallest valid limit."""
         # Setup
         mock_chat_session_repository.get_recent_sessions.return_value = [sample_session]
 
         # Execute
-        result = service.get_recent_sessions(5)
+        result = service.get_recent_sessions(limit)
 
         # Verify
         assert result == [sample_session]
         mock_chat_session_repository.get_recent_sessions.assert_called_once_with(
-            limit=5
+            limit=limit
         )
 
+    @pytest.mark.parametrize("limit", [0, -1, -100])
     def test_get_recent_sessions_invalid_limit(
-        self, service, mock_chat_session_repository
+        self, service, mock_chat_session_repository, limit
     ):
         """Test getting recent sessions with invalid limit."""
         # Execute and verify
         with pytest.raises(ValidationError):
-            service.get_recent_sessions(0)
-
-        with pytest.raises(ValidationError):
-            service.get_recent_sessions(-1)
+            service.get_recent_sessions(limit)
 
         # Verify repository method was not called
         mock_chat_session_repository.get_recent_sessions.assert_not_called()
 
     def test_create_session(
         self,
-        service,
+        monkeypatch,
+        existing_entities,
         mock_chat_session_repository,
         mock_character_repository,
         mock_user_profile_repository,
@@ -234,123 +261,91 @@ class TestChatSessionService:
     ):
         """Test creating a new chat session."""
         # Setup - all entities exist
-        mock_character_repository.get_by_id.return_value = MagicMock()
-        mock_user_profile_repository.get_by_id.return_value = MagicMock()
-        mock_ai_model_repository.get_by_id.return_value = MagicMock()
-        mock_system_prompt_repository.get_by_id.return_value = MagicMock()
         mock_chat_session_repository.create.return_value = sample_session
 
         # Execute
-        with patch("app.services.chat_session_service.datetime") as mock_datetime:
-            mock_datetime.utcnow.return_value = sample_session.start_time
-            result = service.create_session(
-                character_id=1,
-                user_profile_id=1,
-                ai_model_id=1,
-                system_prompt_id=1,
-                pre_prompt="Optional pre-prompt",
-                pre_prompt_enabled=True,
-                post_prompt="Optional post-prompt",
-                post_prompt_enabled=False,
-            )
+        _freeze_utcnow(monkeypatch, _START_TIME)
+        result = existing_entities.create_session(
+            character_id=1,
+            user_profile_id=1,
+            ai_model_id=1,
+            system_prompt_id=1,
+            pre_prompt="Optional pre-prompt",
+            pre_prompt_enabled=True,
+            post_prompt="Optional post-prompt",
+            post_prompt_enabled=False,
+        )
 
         # Verify
         assert result == sample_session
-        mock_character_repository.get_by_id.assert_called_once_with(1)
-        mock_user_profile_repository.get_by_id.assert_called_once_with(1)
-        mock_ai_model_repository.get_by_id.assert_called_once_with(1)
-        mock_system_prompt_repository.get_by_id.assert_called_once_with(1)
-        mock_chat_session_repository.create.assert_called_once()
-        # Check the kwargs passed to create
-        create_kwargs = mock_chat_session_repository.create.call_args[1]
-        assert create_kwargs["character_id"] == 1
-        assert create_kwargs["user_profile_id"] == 1
-        assert create_kwargs["ai_model_id"] == 1
-        assert create_kwargs["system_prompt_id"] == 1
-        assert create_kwargs["pre_prompt"] == "Optional pre-prompt"
-        assert create_kwargs["pre_prompt_enabled"] is True
-        assert create_kwargs["post_prompt"] == "Optional post-prompt"
-        assert create_kwargs["post_prompt_enabled"] is False
-
-    def test_create_session_entity_not_found(
-        self,
-        service,
-        mock_chat_session_repository,
-        mock_character_repository,
-    ):
-        """Test creating a chat session with non-existent character."""
-        # Setup
-        mock_character_repository.get_by_id.side_effect = ResourceNotFoundError(
-            "Not found"
+        _assert_calls(
+            (mock_character_repository.get_by_id, [call(1)]),
+            (mock_user_profile_repository.get_by_id, [call(1)]),
+            (mock_ai_model_repository.get_by_id, [call(1)]),
+            (mock_system_prompt_repository.get_by_id, [call(1)]),
+            (
+                mock_chat_session_repository.create,
+                [
+                    call(
+                        character_id=1,
+                        user_profile_id=1,
+                        ai_model_id=1,
+                        system_prompt_id=1,
+                        pre_prompt="Optional pre-prompt",
+                        pre_prompt_enabled=True,
+                        post_prompt="Optional post-prompt",
+                        post_prompt_enabled=False,
+                        formatting_settings=None,
+                        start_time=_START_TIME,
+                        updated_at=_START_TIME,
+                    )
+                ],
+            ),
         )
 
-        # Execute and verify
-        with pytest.raises(ResourceNotFoundError):
-            service.create_session(
-                character_id=999,  # Non-existent
-                user_profile_id=1,
-                ai_model_id=1,
-                system_prompt_id=1,
-            )
-
-        # Verify repository method was not called
-        mock_chat_session_repository.create.assert_not_called()
-
+    @pytest.mark.parametrize(
+        "enabled_kw,text_kw",
+        [
+            ("pre_prompt_enabled", "pre_prompt"),
+            ("post_prompt_enabled", "post_prompt"),
+        ],
+    )
     def test_create_session_validation_error(
         self,
-        service,
+        existing_entities,
         mock_chat_session_repository,
-        mock_character_repository,
-        mock_user_profile_repository,
-        mock_ai_model_repository,
-        mock_system_prompt_repository,
+        enabled_kw,
+        text_kw,
     ):
-        """Test creating a chat session with invalid data."""
-        # Setup - all entities exist
-        mock_character_repository.get_by_id.return_value = MagicMock()
-        mock_user_profile_repository.get_by_id.return_value = MagicMock()
-        mock_ai_model_repository.get_by_id.return_value = MagicMock()
-        mock_system_prompt_repository.get_by_id.return_value = MagicMock()
-
-        # Execute and verify - pre_prompt_enabled but no pre_prompt
-        with pytest.raises(ValidationError) as excinfo:
-            service.create_session(
-                character_id=1,
-                user_profile_id=1,
-                ai_model_id=1,
-                system_prompt_id=1,
-                pre_prompt=None,
-                pre_prompt_enabled=True,  # Enabled but no text
-            )
-
-        assert "pre_prompt" in excinfo.value.details
-        mock_chat_session_repository.create.assert_not_called()
-
-        # Execute and verify - post_prompt_enabled but no post_prompt
+        """Test creating a chat session with a prompt enabled but no text."""
+        # Execute and verify
         with pytest.raises(ValidationError) as excinfo:
-            service.create_session(
+            existing_entities.create_session(
                 character_id=1,
                 user_profile_id=1,
                 ai_model_id=1,
                 system_prompt_id=1,
-                post_prompt=None,
-                post_prompt_enabled=True,  # Enabled but no text
+                **{text_kw: None, enabled_kw: True},  # Enabled but no text
             )
 
-        assert "post_prompt" in excinfo.value.details
+        assert text_kw in excinfo.value.details
         mock_chat_session_repository.create.assert_not_called()
 
     def test_create_session_with_defaults(
         self,
-        service,
+        monkeypatch,
+        existing_entities,
         mock_chat_session_repository,
         mock_character_repository,
+        mock_user_profile_repository,
+        mock_ai_model_repository,
+        mock_system_prompt_repository,
         mock_application_settings_repository,
         sample_session,
     ):
         """Test creating a new chat session with default settings."""
         # Setup - character exists and defaults are configured
-        mock_character_repository.get_by_id.return_value = MagicMock()
+        mock_character_repository.get_by_id.return_value = _CHARACTER_WITHOUT_GREETING
 
         # Mock application settings with defaults
         mock_settings = MagicMock()
@@ -358,42 +353,43 @@ class TestChatSessionService:
         mock_settings.default_ai_model_id = 2
         mock_settings.default_system_prompt_id = 3
         mock_application_settings_repository.get_settings.return_value = mock_settings
-
-        # Mock validation of default entities
-        service.user_profile_repository.get_by_id.return_value = MagicMock()
-        service.ai_model_repository.get_by_id.return_value = MagicMock()
-        service.system_prompt_repository.get_by_id.return_value = MagicMock()
-
         mock_chat_session_repository.create.return_value = sample_session
 
         # Execute
-        with patch("app.services.chat_session_service.datetime") as mock_datetime:
-            mock_datetime.utcnow.return_value = sample_session.start_time
-            result = service.create_session_with_defaults(character_id=5)
+        _freeze_utcnow(monkeypatch, _START_TIME)
+        result = existing_entities.create_session_with_defaults(character_id=5)
 
         # Verify
         assert result == sample_session
-        # Character repository is called twice: once for initial validation, once in _validate_session_entities
-        assert mock_character_repository.get_by_id.call_count == 2
-        mock_character_repository.get_by_id.assert_has_calls([call(5), call(5)])
-        mock_application_settings_repository.get_settings.assert_called_once()
-
-        # Verify default entities were validated
-        service.user_profile_repository.get_by_id.assert_called_once_with(1)
-        service.ai_model_repository.get_by_id.assert_called_once_with(2)
-        service.system_prompt_repository.get_by_id.assert_called_once_with(3)
-
-        # Verify session was created with defaults
-        mock_chat_session_repository.create.assert_called_once()
-        call_args = mock_chat_session_repository.create.call_args[1]
-        assert call_args["character_id"] == 5
-        assert call_args["user_profile_id"] == 1
-        assert call_args["ai_model_id"] == 2
-        assert call_args["system_prompt_id"] == 3
-        assert call_args["pre_prompt"] is None
-        assert call_args["pre_prompt_enabled"] is False
-        assert call_args["post_prompt"] is None
-        assert call_args["post_prompt_enabled"] is False
+        _assert_calls(
+            # Once for initial validation, once in _validate_session_entities
+            (mock_character_repository.get_by_id, [call(5), call(5)]),
+            (mock_application_settings_repository.get_settings, [call()]),
+            # Default entities were validated
+            (mock_user_profile_repository.get_by_id, [call(1)]),
+            (mock_ai_model_repository.get_by_id, [call(2)]),
+            (mock_system_prompt_repository.get_by_id, [call(3)]),
+            # Session was created with defaults
+            (
+                mock_chat_session_repository.create,
+                [
+                    call(
+                        character_id=5,
+                        user_profile_id=1,
+                        ai_model_id=2,
+                        system_prompt_id=3,
+                        pre_prompt=None,
+                        pre_prompt_enabled=False,
+                        post_prompt=None,
+                        post_prompt_enabled=False,
+                        formatting_settings=mock_settings.default_formatting_rules,
+                        first_message_initialized=True,
+                        start_time=_START_TIME,
+                        updated_at=_START_TIME,
+                    )
+                ],
+            ),
+        )
 
     def test_create_session_with_defaults_missing_defaults(
         self,
@@ -403,7 +399,7 @@ class TestChatSessionService:
     ):
         """Test creating session with defaults when required defaults are missing."""
         # Setup - character exists but defaults are not configured
-        mock_character_repository.get_by_id.return_value = MagicMock()
+        mock_character_repository.get_by_id.return_value = _EXISTS
 
         # Mock application settings with missing defaults
         mock_settings = MagicMock()
@@ -438,7 +434,8 @@ class TestChatSessionService:
 
     def test_update_session(
         self,
-        service,
+        monkeypatch,
+        existing_entities,
         mock_chat_session_repository,
         mock_ai_model_repository,
         mock_system_prompt_repository,
@@ -447,8 +444,6 @@ class TestChatSessionService:
         """Test updating a chat session."""
         # Setup
         mock_chat_session_repository.get_by_id.return_value = sample_session
-        mock_ai_model_repository.get_by_id.return_value = MagicMock()
-        mock_system_prompt_repository.get_by_id.return_value = MagicMock()
 
         updated_session = ChatSession(
             id=1,
@@ -457,7 +452,7 @@ class TestChatSessionService:
             ai_model_id=2,  # Changed
             system_prompt_id=2,  # Changed
             start_time=sample_session.start_time,
-            updated_at=datetime.utcnow(),  # Updated
+            updated_at=_UPDATED_AT,  # Updated
             pre_prompt="New pre-prompt",  # Changed
             pre_prompt_enabled=False,  # Changed
             post_prompt="New post-prompt",  # Changed
@@ -466,36 +461,43 @@ class TestChatSessionService:
         mock_chat_session_repository.update.return_value = updated_session
 
         # Execute
-        with patch("app.services.chat_session_service.datetime") as mock_datetime:
-            mock_datetime.utcnow.return_value = updated_session.updated_at
-            result = service.update_session(
-                session_id=1,
-                ai_model_id=2,
-                system_prompt_id=2,
-                pre_prompt="New pre-prompt",
-                pre_prompt_enabled=False,
-                post_prompt="New post-prompt",
-                post_prompt_enabled=True,
-            )
+        _freeze_utcnow(monkeypatch, _UPDATED_AT)
+        result = existing_entities.update_session(
+            session_id=1,
+            ai_model_id=2,
+            system_prompt_id=2,
+            pre_prompt="New pre-prompt",
+            pre_prompt_enabled=False,
+            post_prompt="New post-prompt",
+            post_prompt_enabled=True,
+        )
 
         # Verify
         assert result == updated_session
-        mock_chat_session_repository.get_by_id.assert_called_once_with(1)
-        mock_ai_model_repository.get_by_id.assert_called_once_with(2)
-        mock_system_prompt_repository.get_by_id.assert_called_once_with(2)
-        mock_chat_session_repository.update.assert_called_once()
-        # Check the kwargs passed to update
-        update_kwargs = mock_chat_session_repository.update.call_args[1]
-        assert update_kwargs["ai_model_id"] == 2
-        assert update_kwargs["system_prompt_id"] == 2
-        assert update_kwargs["pre_prompt"] == "New pre-prompt"
-        assert update_kwargs["pre_prompt_enabled"] is False
-        assert update_kwargs["post_prompt"] == "New post-prompt"
-        assert update_kwargs["post_prompt_enabled"] is True
-        assert "updated_at" in update_kwargs
+        _assert_calls(
+            (mock_chat_session_repository.get_by_id, [call(1)]),
+            (mock_ai_model_repository.get_by_id, [call(2)]),
+            (mock_system_prompt_repository.get_by_id, [call(2)]),
+            (
+                mock_chat_session_repository.update,
+                [
+                    call(
+                        1,
+                        ai_model_id=2,
+                        system_prompt_id=2,
+                        pre_prompt="New pre-prompt",
+                        pre_prompt_enabled=False,
+                        post_prompt="New post-prompt",
+                        post_prompt_enabled=True,
+                        updated_at=_UPDATED_AT,
+                    )
+                ],
+            ),
+        )
 
     def test_update_session_partial(
         self,
+        monkeypatch,
         service,
         mock_chat_session_repository,
         sample_session,
@@ -511,7 +513,7 @@ class TestChatSessionService:
             ai_model_id=1,
             system_prompt_id=1,
             start_time=sample_session.start_time,
-            updated_at=datetime.utcnow(),  # Updated
+            updated_at=_UPDATED_AT,  # Updated
             pre_prompt="New pre-prompt",  # Only this changed
             pre_prompt_enabled=True,
             post_prompt="Optional post-prompt",
@@ -520,22 +522,21 @@ class TestChatSessionService:
         mock_chat_session_repository.update.return_value = updated_session
 
         # Execute - only update pre_prompt
-        with patch("app.services.chat_session_service.datetime") as mock_datetime:
-            mock_datetime.utcnow.return_value = updated_session.updated_at
-            result = service.update_session(
-                session_id=1,
-                pre_prompt="New pre-prompt",
-            )
+        _freeze_utcnow(monkeypatch, _UPDATED_AT)
+        result = service.update_session(
+            session_id=1,
+            pre_prompt="New pre-prompt",
+        )
 
-        # Verify
+        # Verify - only pre_prompt and updated_at are sent
         assert result == updated_session
-        mock_chat_session_repository.get_by_id.assert_called_once_with(1)
-        mock_chat_session_repository.update.assert_called_once()
-        # Check the kwargs passed to update
-        update_kwargs = mock_chat_session_repository.update.call_args[1]
-        assert len(update_kwargs) == 2  # Only pre_prompt and updated_at
-        assert update_kwargs["pre_prompt"] == "New pre-prompt"
-        assert "updated_at" in update_kwargs
+        _assert_calls(
+            (mock_chat_session_repository.get_by_id, [call(1)]),
+            (
+                mock_chat_session_repository.update,
+                [call(1, pre_prompt="New pre-prompt", updated_at=_UPDATED_AT)],
+            ),
+        )
 
     def test_update_session_no_changes(
         self,
@@ -555,25 +556,31 @@ class TestChatSessionService:
         mock_chat_session_repository.get_by_id.assert_called_once_with(1)
         mock_chat_session_repository.update.assert_not_called()
 
+    @pytest.mark.parametrize(
+        "existing_entities",
+        [
+            pytest.param(("system_prompt",), id="ai_model_missing"),
+            pytest.param(("ai_model",), id="system_prompt_missing"),
+            pytest.param((), id="both_missing"),
+        ],
+        indirect=True,
+    )
     def test_update_session_entity_not_found(
         self,
-        service,
+        existing_entities,
         mock_chat_session_repository,
-        mock_ai_model_repository,
         sample_session,
     ):
-        """Test updating a chat session with non-existent AI model."""
+        """Test updating a chat session to reference a non-existent entity."""
         # Setup
         mock_chat_session_repository.get_by_id.return_value = sample_session
-        mock_ai_model_repository.get_by_id.side_effect = ResourceNotFoundError(
-            "Not found"
-        )
 
         # Execute and verify
         with pytest.raises(ResourceNotFoundError):
-            service.update_session(
+            existing_entities.update_session(
                 session_id=1,
-                ai_model_id=999,  # Non-existent
+                ai_model_id=999,
+                system_prompt_id=999,
             )
 
         # Verify repository method was not called
@@ -607,21 +614,3 @@ class TestChatSessionService:
         # Verify
         mock_chat_session_repository.get_by_id.assert_called_once_with(1)
         mock_chat_session_repository.delete.assert_called_once_with(1)
-
-    def test_delete_session_not_found(
-        self,
-        service,
-        mock_chat_session_repository,
-    ):
-        """Test deleting a non-existent chat session."""
-        # Setup
-        mock_chat_session_repository.get_by_id.side_effect = ResourceNotFoundError(
-            "Not found"
-        )
-
-        # Execute and verify
-        with pytest.raises(ResourceNotFoundError):
-            service.delete_session(999)
-
-        # Verify repository method was not called
-        mock_chat_session_repository.delete.assert_not_called()
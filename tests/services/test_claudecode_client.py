@@ -1,15 +1,23 @@
 """Tests for ClaudeCodeClient."""
 
-import json
-import subprocess
 from unittest.mock import Mock, patch, MagicMock
 
 import pytest
 
-from app.services.claudecode.client import ClaudeCodeClient
+from app.services.claudecode.client import ClaudeCodeClient, _recover_json
 from app.utils.exceptions import ValidationError
 
 
+def _stream(lines, return_code=0, stderr="", timed_out=False):
+    """Build a mock spawn_streaming() process yielding the given stdout lines."""
+    stream = MagicMock()
+    stream.__iter__.return_value = iter(lines)
+    stream.wait.return_value = return_code
+    stream.read_stderr.return_value = stderr
+    stream.timed_out = timed_out
+    return stream
+
+
 class TestClaudeCodeClient:
     """Test cases for ClaudeCodeClient."""
 
@@ -17,6 +25,12 @@ class TestClaudeCodeClient:
         """Set up test fixtures."""
         self.client = ClaudeCodeClient(timeout=30)
 
+    @pytest.fixture(autouse=True)
+    def spawn_streaming(self):
+        """Patch the subprocess spawner; tests set the stream it enters with."""
+        with patch("app.services.claudecode.client.spawn_streaming") as mock_spawn:
+            yield mock_spawn
+
     def test_init_default_timeout(self):
         """Test client initialization with default timeout."""
         with patch("app.services.claudecode.client.get_config") as mock_config:
@@ -52,35 +66,22 @@ class TestClaudeCodeClient:
         with pytest.raises(ValidationError, match="Conversation text is required"):
             list(self.client.chat_completion_stream("system prompt", ""))
 
-    @patch("app.services.claudecode.client.subprocess.Popen")
-    def test_chat_completion_stream_success(self, mock_popen):
+    def test_chat_completion_stream_success(self, spawn_streaming):
         """Test successful chat completion stream."""
-        # Mock subprocess
-        mock_process = Mock()
-        mock_process.stdin = Mock()
-        mock_process.stdout = Mock()
-        mock_process.stderr = Mock()
-        mock_process.wait.return_value = 0
-        mock_process.poll.return_value = 0
-        
-        # Mock stdout responses
-        responses = [
-            '{"type":"system","message":"Starting Claude Code"}',
-            '{"type":"assistant","message":{"content":[{"text":"Hello, "}]}}',
-            '{"type":"assistant","message":{"content":[{"text":"how can I help you?"}]}}',
-            '{"type":"result","usage":{"input_tokens":10,"output_tokens":5}}',
-            ''  # End of stream
-        ]
-        mock_process.stdout.readline.side_effect = responses
-        
-        mock_popen.return_value = mock_process
-        
+        # Mock the CLI's stdout lines
+        spawn_streaming.return_value.__enter__.return_value = _stream([
+            b'{"type":"system","message":"Starting Claude Code"}',
+            b'{"type":"assistant","message":{"content":[{"text":"Hello, "}]}}',
+            b'{"type":"assistant","message":{"content":[{"text":"how can I help you?"}]}}',
+            b'{"type":"result","usage":{"input_tokens":10,"output_tokens":5}}',
+        ])
+
         # Execute
         result = list(self.client.chat_completion_stream(
-            "You are helpful", 
+            "You are helpful",
             "User: Hello\n"
         ))
-        
+
         # Verify
         expected_chunks = [
             {"type": "system", "message": "Starting Claude Code"},
@@ -88,171 +89,157 @@ class TestClaudeCodeClient:
             {"type": "assistant", "message": {"content": [{"text": "how can I help you?"}]}},
             {"type": "result", "usage": {"input_tokens": 10, "output_tokens": 5}}
         ]
-        
+
         assert result == expected_chunks
-        
-        # Verify subprocess call
-        mock_popen.assert_called_once_with(
+
+        # Verify the command, timeout and stdin input
+        spawn_streaming.assert_called_once_with(
             [
                 "claude",
                 "--print",
-                "--verbose", 
+                "--verbose",
                 "--output-format", "stream-json",
                 "--append-system-prompt", "You are helpful"
             ],
-            stdin=subprocess.PIPE,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            encoding='utf-8'
+            timeout=30,
+            stdin_data=b"User: Hello"
         )
-        
-        # Verify stdin input
-        mock_process.stdin.write.assert_called_once_with("User: Hello")
-        mock_process.stdin.close.assert_called_once()
+        spawn_streaming.return_value.__exit__.assert_called_once()
 
-    @patch("app.services.claudecode.client.subprocess.Popen")
-    def test_chat_completion_stream_invalid_json(self, mock_popen):
+    def test_chat_completion_stream_invalid_json(self, spawn_streaming):
         """Test chat completion stream with invalid JSON response."""
-        # Mock subprocess
-        mock_process = Mock()
-        mock_process.stdin = Mock()
-        mock_process.stdout = Mock()
-        mock_process.stderr = Mock()
-        mock_process.wait.return_value = 0
-        mock_process.poll.return_value = 0
-        
         # Mock stdout with invalid JSON
-        responses = [
-            '{"type":"system","message":"Starting"}',
-            'invalid json line',
-            '{"type":"assistant","message":{"content":[{"text":"response"}]}}',
-            ''  # End of stream
-        ]
-        mock_process.stdout.readline.side_effect = responses
-        
-        mock_popen.return_value = mock_process
-        
+        spawn_streaming.return_value.__enter__.return_value = _stream([
+            b'{"type":"system","message":"Starting"}',
+            b'invalid json line',
+            b'{"type":"assistant","message":{"content":[{"text":"response"}]}}',
+        ])
+
         # Execute - should skip invalid JSON
         result = list(self.client.chat_completion_stream(
-            "You are helpful", 
+            "You are helpful",
             "User: Hello\n"
         ))
-        
+
         # Verify only valid JSON chunks are returned
         expected_chunks = [
             {"type": "system", "message": "Starting"},
             {"type": "assistant", "message": {"content": [{"text": "response"}]}}
         ]
-        
+
         assert result == expected_chunks
 
-    @patch("app.services.claudecode.client.subprocess.Popen")
-    def test_chat_completion_stream_process_error(self, mock_popen):
+    def test_chat_completion_stream_recovers_wrapped_json(self, spawn_streaming):
+        """Test chat completion stream salvages objects wrapped in fences or prose."""
+        spawn_streaming.return_value.__enter__.return_value = _stream([
+            b'```json {"type":"assistant","message":{"content":[{"text":"fenced"}]}} ```',
+            b'Result: {"type":"result","usage":{"output_tokens":1}} (done)',
+        ])
+
+        # Execute
+        result = list(self.client.chat_completion_stream(
+            "You are helpful",
+            "User: Hello\n"
+        ))
+
+        # Verify both wrapped objects are recovered
+        assert result == [
+            {"type": "assistant", "message": {"content": [{"text": "fenced"}]}},
+            {"type": "result", "usage": {"output_tokens": 1}}
+        ]
+
+    def test_chat_completion_stream_filter_types(self, spawn_streaming):
+        """Test only the requested chunk types are yielded, and others are not parsed."""
+        spawn_streaming.return_value.__enter__.return_value = _stream([
+            b'{"type":"system","message":"Starting"}',
+            b'{"type":"assistant","message":{"content":[{"text":"Hi"}]}}',
+            b'```json {"type":"user","message":"wrapped"}```',
+            b'{"type":"result","usage":{"output_tokens":1}}',
+        ])
+
+        with patch(
+            "app.services.claudecode.client._recover_json", wraps=_recover_json
+        ) as mock_recover_json:
+            result = list(self.client.chat_completion_stream(
+                "You are helpful",
+                "User: Hello\n",
+                filter_types={"assistant"}
+            ))
+
+        assert result == [
+            {"type": "assistant", "message": {"content": [{"text": "Hi"}]}}
+        ]
+        # The system and result lines are rejected by prefix; the wrapped line
+        # has to be parsed to learn its type
+        assert mock_recover_json.call_count == 2
+
+    @pytest.mark.parametrize(
+        "line, expected",
+        [
+            (b'{"type":"system"}', {"type": "system"}),
+            (b'```json {"type":"system"}```', {"type": "system"}),
+            (b'prefix {"type":"system"} suffix', {"type": "system"}),
+            (b'invalid json line', None),
+            (b'} reversed {', None),
+            (b'{"type": unterminated}', None),
+        ],
+        ids=["plain", "fenced", "prose", "no_braces", "reversed_braces", "broken_object"],
+    )
+    def test_recover_json(self, line, expected):
+        """Test JSON recovery from stray text around a stream-json object."""
+        assert _recover_json(line) == expected
+
+    def test_chat_completion_stream_process_error(self, spawn_streaming):
         """Test chat completion stream with process error."""
-        # Mock subprocess with error return code
-        mock_process = Mock()
-        mock_process.stdin = Mock()
-        mock_process.stdout = Mock()
-        mock_process.stderr = Mock()
-        mock_process.wait.return_value = 1
-        mock_process.stderr.read.return_value = "Command failed"
-        
-        # Mock empty stdout
-        mock_process.stdout.readline.side_effect = ['']
-        
-        mock_popen.return_value = mock_process
-        
+        # Mock empty stdout and an error return code
+        spawn_streaming.return_value.__enter__.return_value = _stream(
+            [], return_code=1, stderr="Command failed"
+        )
+
         # Execute and expect exception
-        with pytest.raises(Exception, match="Claude Code CLI failed with return code 1: Command failed"):
+        with pytest.raises(Exception, match="^Claude Code CLI failed with return code 1: Command failed"):
             list(self.client.chat_completion_stream(
-                "You are helpful", 
+                "You are helpful",
                 "User: Hello\n"
             ))
 
-    @patch("app.services.claudecode.client.subprocess.Popen")
-    def test_chat_completion_stream_file_not_found(self, mock_popen):
+    def test_chat_completion_stream_file_not_found(self, spawn_streaming):
         """Test chat completion stream with executable not found."""
-        mock_popen.side_effect = FileNotFoundError("File not found")
-        
+        spawn_streaming.return_value.__enter__.side_effect = FileNotFoundError("File not found")
+
         # Execute and expect exception
         with pytest.raises(Exception, match="Claude Code CLI executable not found: claude"):
             list(self.client.chat_completion_stream(
-                "You are helpful", 
+                "You are helpful",
                 "User: Hello\n"
             ))
 
-    @patch("app.services.claudecode.client.subprocess.Popen")
-    @patch("app.services.claudecode.client.time.time")
-    def test_chat_completion_stream_timeout(self, mock_time, mock_popen):
-        """Test chat completion stream with timeout."""
-        # Mock subprocess
-        mock_process = Mock()
-        mock_process.stdin = Mock()
-        mock_process.stdout = Mock()
-        mock_process.stderr = Mock()
-        mock_process.terminate = Mock()
-        mock_process.wait = Mock()
-        mock_process.poll.return_value = None  # Process still running
-        mock_process.kill = Mock()
-        
-        # Mock time to simulate timeout
-        mock_time.side_effect = [0, 31]  # Start time, then time after timeout
-        
-        # Mock stdout that never ends
-        def readline_side_effect():
-            return '{"type":"system","message":"Starting"}'
-        
-        mock_process.stdout.readline.side_effect = readline_side_effect
-        
-        mock_popen.return_value = mock_process
-        
-        # Execute with 30 second timeout and expect exception
-        client = ClaudeCodeClient(timeout=30)
-        with pytest.raises(Exception, match="Claude Code CLI timed out after 30 seconds"):
-            list(client.chat_completion_stream(
-                "You are helpful", 
+    def test_chat_completion_stream_timeout(self, spawn_streaming):
+        """Test chat completion stream when the CLI is stopped by the timeout."""
+        # Mock a stream cut short by the timeout
+        spawn_streaming.return_value.__enter__.return_value = _stream(
+            [b'{"type":"system","message":"Starting"}'], return_code=-15, timed_out=True
+        )
+
+        # Execute and expect exception
+        with pytest.raises(Exception, match="^Claude Code CLI timed out after 30 seconds"):
+            list(self.client.chat_completion_stream(
+                "You are helpful",
                 "User: Hello\n"
             ))
-        
-        # Verify timeout handling
-        mock_process.terminate.assert_called_once()
-
-    @patch("app.services.claudecode.client.subprocess.Popen")
-    def test_chat_completion_stream_broken_pipe(self, mock_popen):
-        """Test chat completion stream with broken pipe on stdin."""
-        # Mock subprocess
-        mock_process = Mock()
-        mock_process.stdin = Mock()
-        mock_process.stdout = Mock()
-        mock_process.stderr = Mock()
-        mock_process.wait.return_value = 0
-        mock_process.poll.return_value = 0
-        
-        # Mock broken pipe on stdin write
-        mock_process.stdin.write.side_effect = BrokenPipeError("Broken pipe")
-        
-        # Mock stdout response
-        responses = [
-            '{"type":"assistant","message":{"content":[{"text":"response"}]}}',
-            ''  # End of stream
-        ]
-        mock_process.stdout.readline.side_effect = responses
-        
-        mock_popen.return_value = mock_process
-        
-        # Execute - should handle broken pipe gracefully
-        result = list(self.client.chat_completion_stream(
-            "You are helpful", 
-            "User: Hello\n"
-        ))
-        
-        # Should still get response despite broken pipe
-        expected_chunks = [
-            {"type": "assistant", "message": {"content": [{"text": "response"}]}}
-        ]
-        
-        assert result == expected_chunks
+
+    def test_chat_completion_stream_closed_early(self, spawn_streaming):
+        """Test abandoning the stream leaves the spawn context, stopping the CLI."""
+        spawn_streaming.return_value.__enter__.return_value = _stream([
+            b'{"type":"system","message":"Starting"}',
+            b'{"type":"result"}',
+        ])
+
+        stream = self.client.chat_completion_stream("You are helpful", "User: Hello\n")
+        assert next(stream) == {"type": "system", "message": "Starting"}
+        stream.close()
+
+        spawn_streaming.return_value.__exit__.assert_called_once()
 
     @patch.object(ClaudeCodeClient, "chat_completion_stream")
     def test_test_connection_success(self, mock_stream):
@@ -268,7 +255,8 @@ class TestClaudeCodeClient:
         assert result is True
         mock_stream.assert_called_once_with(
             "You are a helpful assistant.",
-            "Hello, this is a connection test."
+            "Hello, this is a connection test.",
+            filter_types={"assistant"}
         )
 
     @patch.object(ClaudeCodeClient, "chat_completion_stream")
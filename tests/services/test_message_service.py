@@ -890,6 +890,7 @@ class TestMessageServiceClaudeCodeIntegration:
         call_args = mock_claudecode_client.chat_completion_stream.call_args
         assert "You are a helpful assistant." in call_args[1]["system_prompt"]
         assert "User: Hello" in call_args[1]["conversation_text"]
+        assert call_args[1]["filter_types"] == {"assistant"}
 
     def test_generate_streaming_response_claude_code_no_client(
         self,
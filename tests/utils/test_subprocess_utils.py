@@ -0,0 +1,267 @@
+"""Tests for streaming subprocess utilities."""
+
+import os
+import signal
+import subprocess
+import sys
+from unittest.mock import Mock, call, patch
+
+import pytest
+
+from app.utils.subprocess_utils import (
+    _PROCESS_GROUP_KWARGS,
+    _iter_lines,
+    _write_stdin,
+    spawn_streaming,
+)
+
+COMMAND = ["claude", "--print"]
+
+
+@pytest.fixture
+def mock_popen():
+    """Patch Popen with a process whose stdout ends immediately.
+
+    waitid() is patched too, as the mock process's PID is not a real child.
+    """
+    with (
+        patch("app.utils.subprocess_utils.subprocess.Popen") as popen,
+        patch("app.utils.subprocess_utils.os.waitid", create=True),
+    ):
+        process = popen.return_value
+        process.pid = 4321
+        process.wait.return_value = 0
+        process.poll.return_value = 0
+        process.stdout.read1.side_effect = [b""]
+        yield popen
+
+
+@pytest.fixture
+def mock_timer():
+    """Patch the timeout timer so it only fires when a test calls it."""
+    with patch("app.utils.subprocess_utils.threading.Timer") as timer:
+        yield timer
+
+
+@pytest.mark.unit
+class TestSpawnStreaming:
+    """Test cases for spawn_streaming against a mocked process."""
+
+    def test_spawn_arguments(self, mock_popen, mock_timer):
+        """Test the process is started with tuned pipes in its own process group."""
+        with patch("app.utils.subprocess_utils._write_stdin") as write_stdin:
+            with spawn_streaming(COMMAND, timeout=30, stdin_data=b"Hello") as stream:
+                assert list(stream) == []
+
+        mock_popen.assert_called_once_with(
+            COMMAND,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            bufsize=65536,
+            **_PROCESS_GROUP_KWARGS,
+        )
+        write_stdin.assert_called_once_with(mock_popen.return_value, b"Hello")
+        assert mock_timer.call_args[0][0] == 30
+        mock_timer.return_value.start.assert_called_once()
+        mock_timer.return_value.cancel.assert_called_once()
+
+    def test_iterates_stripped_lines(self, mock_popen, mock_timer):
+        """Test blank lines are dropped and surrounding whitespace is stripped."""
+        mock_popen.return_value.stdout.read1.side_effect = [
+            b'  {"type":"system"} \n\n{"type":"res',
+            b'ult"}\r\n',
+            b"",
+        ]
+
+        with spawn_streaming(COMMAND, timeout=30) as stream:
+            lines = list(stream)
+            return_code = stream.wait()
+
+            # The timeout is disarmed as soon as the process has exited
+            mock_timer.return_value.cancel.assert_called_once_with()
+
+        assert lines == [b'{"type":"system"}', b'{"type":"result"}']
+        assert return_code == 0
+        assert not stream.timed_out
+        mock_popen.return_value.stdin.close.assert_called_once_with()
+
+    def test_read_stderr(self, mock_popen, mock_timer):
+        """Test stderr output is decoded."""
+        mock_popen.return_value.stderr.read.return_value = b"Command failed"
+
+        with spawn_streaming(COMMAND, timeout=30) as stream:
+            assert stream.read_stderr() == "Command failed"
+
+    @pytest.mark.skipif(os.name != "posix", reason="process groups are POSIX-only")
+    @pytest.mark.parametrize(
+        "exits_on_terminate", [True, False], ids=["graceful", "hung"]
+    )
+    def test_timeout(self, mock_popen, mock_timer, exits_on_terminate):
+        """Test timeout sends SIGTERM, then SIGKILL only if the grace period ends."""
+        process = mock_popen.return_value
+        # Running until the first signal
+        process.poll.side_effect = lambda: None if not mock_killpg.called else -15
+
+        def wait_side_effect(timeout=None):
+            if timeout is not None and not exits_on_terminate:
+                raise subprocess.TimeoutExpired(COMMAND, timeout)
+            return -15 if exits_on_terminate else -9
+
+        process.wait.side_effect = wait_side_effect
+
+        # Fire the timer while stdout is being read; stopping closes stdout
+        def read1_side_effect(size):
+            if mock_killpg.called:
+                return b""
+            mock_timer.call_args[0][1]()
+            return b'{"type":"system"}\n'
+
+        process.stdout.read1.side_effect = read1_side_effect
+
+        with patch("app.utils.subprocess_utils.os.killpg") as mock_killpg:
+            with spawn_streaming(COMMAND, timeout=30) as stream:
+                assert list(stream) == [b'{"type":"system"}']
+                stream.wait()
+
+        assert stream.timed_out
+        # Signals go to the whole process group, not just the process
+        expected_signals = [call(4321, signal.SIGTERM)]
+        if not exits_on_terminate:
+            expected_signals.append(call(4321, signal.SIGKILL))
+        assert mock_killpg.call_args_list == expected_signals
+        process.wait.assert_any_call(timeout=0.1)
+        process.terminate.assert_not_called()
+        process.kill.assert_not_called()
+
+    def test_wait_without_waitid(self, mock_popen, mock_timer, monkeypatch):
+        """Test wait() falls back to a plain wait where waitid() is missing."""
+        monkeypatch.setattr("app.utils.subprocess_utils._WAIT_WITHOUT_REAPING", False)
+        monkeypatch.delattr(os, "waitid", raising=False)
+
+        with spawn_streaming(COMMAND, timeout=30) as stream:
+            assert stream.wait() == 0
+
+        mock_popen.return_value.wait.assert_called_with()
+        mock_timer.return_value.cancel.assert_called()
+
+    @pytest.mark.skipif(os.name != "posix", reason="process groups are POSIX-only")
+    def test_timeout_after_exit(self, mock_popen, mock_timer):
+        """Test a timer firing after the process exited neither signals nor times out."""
+        with patch("app.utils.subprocess_utils.os.killpg") as mock_killpg:
+            with spawn_streaming(COMMAND, timeout=30) as stream:
+                list(stream)
+                stream.wait()
+                # The timer thread was already running when wait() cancelled it
+                mock_timer.call_args[0][1]()
+
+        mock_killpg.assert_not_called()
+        assert not stream.timed_out
+
+    @pytest.mark.skipif(os.name != "posix", reason="process groups are POSIX-only")
+    def test_stdin_failure_stops_process(self, mock_popen, mock_timer):
+        """Test a failed stdin write stops the process, as __exit__ will not run."""
+        mock_popen.return_value.poll.return_value = None
+
+        with (
+            patch(
+                "app.utils.subprocess_utils._write_stdin", side_effect=OSError("EIO")
+            ),
+            patch("app.utils.subprocess_utils.os.killpg") as mock_killpg,
+        ):
+            with pytest.raises(OSError, match="EIO"):
+                with spawn_streaming(COMMAND, timeout=30, stdin_data=b"Hello"):
+                    pytest.fail("the block must not run")
+
+        mock_timer.return_value.cancel.assert_called_once_with()
+        mock_killpg.assert_called_once_with(4321, signal.SIGTERM)
+
+    @pytest.mark.skipif(os.name != "posix", reason="process groups are POSIX-only")
+    def test_exit_stops_running_process(self, mock_popen, mock_timer):
+        """Test leaving the block early stops a process that is still running."""
+        mock_popen.return_value.poll.return_value = None
+
+        with patch("app.utils.subprocess_utils.os.killpg") as mock_killpg:
+            with spawn_streaming(COMMAND, timeout=30):
+                pass
+
+        mock_killpg.assert_called_once_with(4321, signal.SIGTERM)
+        mock_timer.return_value.cancel.assert_called_once()
+
+    def test_broken_pipe(self, mock_popen, mock_timer):
+        """Test a process that exits before reading stdin is still streamed."""
+        process = mock_popen.return_value
+        process.stdout.read1.side_effect = [b'{"type":"result"}\n', b""]
+
+        # Real stdin pipe whose reading end is already closed
+        read_fd, write_fd = os.pipe()
+        os.close(read_fd)
+        process.stdin = open(write_fd, "wb")
+
+        with spawn_streaming(COMMAND, timeout=30, stdin_data=b"Hello") as stream:
+            assert list(stream) == [b'{"type":"result"}']
+
+        assert process.stdin.closed
+
+
+@pytest.mark.integration
+class TestSpawnStreamingRealProcess:
+    """Test cases for spawn_streaming running a real Python child process."""
+
+    def test_real_process(self):
+        """Test stdin round-trips through a real child process."""
+        command = [
+            sys.executable,
+            "-c",
+            "import sys; sys.stdout.write(sys.stdin.read())",
+        ]
+
+        with spawn_streaming(command, timeout=30, stdin_data=b"a\n\nb") as stream:
+            lines = list(stream)
+            return_code = stream.wait()
+
+        assert lines == [b"a", b"b"]
+        assert return_code == 0
+
+    def test_real_process_timeout(self):
+        """Test a real child that outlives the timeout is stopped."""
+        command = [sys.executable, "-c", "import time; time.sleep(30)"]
+
+        with spawn_streaming(command, timeout=0.2) as stream:
+            assert list(stream) == []
+            return_code = stream.wait()
+
+        assert stream.timed_out
+        assert return_code != 0
+
+
+@pytest.mark.unit
+class TestWriteStdin:
+    """Test cases for _write_stdin."""
+
+    def test_write_stdin(self):
+        """Test the whole payload reaches the pipe and stdin is closed."""
+        read_fd, write_fd = os.pipe()
+        process = Mock()
+        process.stdin = open(write_fd, "wb")
+
+        _write_stdin(process, b"User: Hello")
+
+        with open(read_fd, "rb") as reader:
+            assert reader.read() == b"User: Hello"
+        assert process.stdin.closed
+
+
+@pytest.mark.unit
+class TestIterLines:
+    """Test cases for _iter_lines."""
+
+    def test_carries_partial_lines(self):
+        """Test lines split across reads are rejoined and a final line is kept."""
+        stream = Mock()
+        stream.read1.side_effect = [b"first\nsec", b"ond\n\nth", b"ird", b""]
+
+        lines = list(_iter_lines(stream, chunk_size=8))
+
+        assert lines == [b"first", b"second", b"", b"third"]
+        stream.read1.assert_called_with(8)